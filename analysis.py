@@ -1,22 +1,112 @@
-from statistics import stdev
-from main import GameType
+from math import sqrt, inf
+from statistics import NormalDist
+import numpy as np
+import main as m
+import instrument as ins
 import protocols as pr
 
+# Fixed histogram bins of per-game chips won: HIST_BINS bins of HIST_WIDTH chips
+# from HIST_LOW, plus an underflow bin first and an overflow bin last.
+HIST_LOW: int   = -400
+HIST_WIDTH: int = 4
+HIST_BINS: int  = 200
+
+def combine_moments(n_a: int, mean_a: float, m2_a: float, \
+                    n_b: int, mean_b: float, m2_b: float) -> tuple[int, float, float]:
+    ''' Combines the count, mean and sum of squared deviations of two samples
+        (Chan et al.'s pairwise form of Welford's update). '''
+    n: int = n_a + n_b
+    if n == 0:
+        return 0, 0.0, 0.0
+    delta: float = mean_b - mean_a
+    return n, mean_a + delta*n_b/n, m2_a + m2_b + delta*delta*n_a*n_b/n
+
 class Analysis():
-    def __init__(self, gtype: GameType, player_strategies: list[pr.Strategy], \
+    ''' Accumulates per-player results in constant memory.
+            'turns' and 'chips_won' are exact totals.
+            Per-game chips won are summarized online: Welford mean and 'm2'
+                (sum of squared deviations), 'low'/'high' extremes, and a fixed-bin
+                'histogram' (see HIST_LOW, HIST_WIDTH, HIST_BINS).
+            'merge' combines two Analyses of the same players as if one had
+                recorded all the games.
+            'stats' are the EngineStats of an instrumented run, or None. '''
+    def __init__(self, gtype: m.GameType, player_strategies: list[pr.Strategy], \
                  game_count: int, ante: int) -> None:
-        self.gtype : GameType = gtype
+        self.gtype : m.GameType = gtype
         self.player_strategies: list[pr.Strategy]  = player_strategies
         self.game_count: int  = game_count
         self.ante : int              = ante
         self.player_count: int       = len(self.player_strategies)
         self.turns: list[int]        = [0]*self.player_count
         self.chips_won: list[int]    = [0]*self.player_count
-        self.payouts:list[list[int]] = [[] for _ in range(self.player_count)]
+        self.count: int              = 0
+        self.mean: list[float]       = [0.0]*self.player_count
+        self.m2: list[float]         = [0.0]*self.player_count
+        self.low: list[float]        = [inf]*self.player_count
+        self.high: list[float]       = [-inf]*self.player_count
+        self.histogram: np.ndarray   = np.zeros((self.player_count, HIST_BINS+2), \
+                                                dtype=np.int64)
+        self.stats: ins.EngineStats | None = None
+
+    def record_game(self, turns: list[int], chips_won: list[int]) -> None:
+        ''' Records one game's turns and chips won, per player. '''
+        self.count += 1
+        for p in range(self.player_count):
+            x: int = chips_won[p]
+            self.turns[p]     += turns[p]
+            self.chips_won[p] += x
+            delta: float  = x - self.mean[p]
+            self.mean[p] += delta/self.count
+            self.m2[p]   += delta*(x - self.mean[p])
+            self.low[p]   = min(self.low[p], x)
+            self.high[p]  = max(self.high[p], x)
+            self.histogram[p, min(max((x-HIST_LOW)//HIST_WIDTH + 1, 0), HIST_BINS+1)] += 1
+
+    def record_games(self, turns: np.ndarray, chips_won: np.ndarray) -> None:
+        ''' Records many games at once, given as arrays with a row per game and
+            a column per player. '''
+        games: int = len(chips_won)
+        if games == 0:
+            return
+        bins: np.ndarray = np.clip((chips_won-HIST_LOW)//HIST_WIDTH + 1, 0, HIST_BINS+1)
+        for p in range(self.player_count):
+            x: np.ndarray = chips_won[:, p]
+            mean: float   = float(x.mean())
+            self.turns[p]     += int(turns[:, p].sum())
+            self.chips_won[p] += int(x.sum())
+            _, self.mean[p], self.m2[p] = combine_moments(self.count, self.mean[p], self.m2[p], \
+                                                          games, mean, float(((x-mean)**2).sum()))
+            self.low[p]   = min(self.low[p], int(x.min()))
+            self.high[p]  = max(self.high[p], int(x.max()))
+            self.histogram[p] += np.bincount(bins[:, p], minlength=HIST_BINS+2)
+        self.count += games
+
+    def merge(self, other: 'Analysis') -> None:
+        ''' Adds the games of another Analysis of the same players to this one. '''
+        self.game_count += other.game_count
+        for p in range(self.player_count):
+            self.turns[p]     += other.turns[p]
+            self.chips_won[p] += other.chips_won[p]
+            _, self.mean[p], self.m2[p] = combine_moments(self.count, self.mean[p], self.m2[p], \
+                                                          other.count, other.mean[p], other.m2[p])
+            self.low[p]  = min(self.low[p], other.low[p])
+            self.high[p] = max(self.high[p], other.high[p])
+        self.histogram += other.histogram
+        self.count     += other.count
+
+    def stdev(self, p: int) -> float:
+        ''' Sample standard deviation of player p's chips won per game. '''
+        return sqrt(self.m2[p]/(self.count-1)) if self.count > 1 else 0.0
+
+    def roi(self, p: int) -> float:
+        ''' Player p's chips won per turn. '''
+        return self.chips_won[p]/self.turns[p] if self.turns[p]!=0 else 0
+
+    def chips_per_game(self, p: int) -> float:
+        return self.chips_won[p]/self.count if self.count else 0.0
 
     def display_results(self):
-        roi = [self.chips_won[i]/self.turns[i] if self.turns[i]!=0 else 0 \
-               for i in range(self.player_count)]
+        roi = [self.roi(i) for i in range(self.player_count)]
         print(f"{self.gtype}\t\tNumber of games: {self.game_count}\t\tAnte: {self.ante}")
         for p in range(self.player_count):
            pl: str    = f'Player {p}'
@@ -24,6 +114,57 @@ class Analysis():
            t: str     = f'  Turns: {self.turns[p]:>10}'
            cw: str    = f' Chips Won: {self.chips_won[p]:>9}'
            r: str     = f' ROI/t: {roi[p]:10.5f}'
-           cwg: str   = f'\tChips Won/g: {sum(self.payouts[p])/self.game_count:8.3f}'
-           sd: str    = f' {stdev(self.payouts[p]):8.2f}' 
+           cwg: str   = f'\tChips Won/g: {self.chips_won[p]/self.game_count:8.3f}'
+           sd: str    = f' {self.stdev(p):8.2f}'
            print(pl+strat+t+cw+r+cwg+sd)
+
+class BatchMeans():
+    ''' Batch means confidence intervals: each batch of games contributes one
+        value per statistic (e.g. a seat's ROI over the batch), and the spread of
+        those values across batches estimates the error of their mean. That
+        holds for ratios such as ROI per turn, where per-game values would not.
+        Intervals use the normal quantile, so 'min_batches' should be a few
+        dozen before they are trusted. '''
+    def __init__(self, size: int) -> None:
+        self.size: int          = size
+        self.batches: int       = 0
+        self.mean: list[float]  = [0.0]*size
+        self.m2: list[float]    = [0.0]*size
+
+    def add(self, values: list[float]) -> None:
+        ''' Adds one batch's value of every statistic. '''
+        for i in range(self.size):
+            _, self.mean[i], self.m2[i] = combine_moments(self.batches, self.mean[i], self.m2[i], \
+                                                          1, values[i], 0.0)
+        self.batches += 1
+
+    def merge(self, other: 'BatchMeans') -> None:
+        ''' Adds the batches of another BatchMeans of the same statistics. '''
+        for i in range(self.size):
+            _, self.mean[i], self.m2[i] = combine_moments(self.batches, self.mean[i], self.m2[i], \
+                                                          other.batches, other.mean[i], other.m2[i])
+        self.batches += other.batches
+
+    def select(self, indices: list[int]) -> 'BatchMeans':
+        ''' A BatchMeans of just the statistics at 'indices'. '''
+        selected: BatchMeans = BatchMeans(len(indices))
+        selected.batches = self.batches
+        selected.mean    = [self.mean[i] for i in indices]
+        selected.m2      = [self.m2[i] for i in indices]
+        return selected
+
+    def variance(self, i: int) -> float:
+        ''' Sample variance of statistic i across batches. '''
+        return self.m2[i]/(self.batches-1) if self.batches > 1 else inf
+
+    def stderr(self) -> list[float]:
+        ''' Standard error of each statistic's mean; infinite with fewer than
+            two batches. '''
+        if self.batches < 2:
+            return [inf]*self.size
+        return [sqrt(self.variance(i)/self.batches) for i in range(self.size)]
+
+    def half_width(self, confidence: float) -> list[float]:
+        ''' Half-width of each statistic's confidence interval. '''
+        z: float = NormalDist().inv_cdf((1 + confidence)/2)
+        return [z*se for se in self.stderr()]
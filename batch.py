@@ -0,0 +1,279 @@
+import numpy as np
+import main as m
+import turnlog as tl
+import protocols as p
+import cards as c
+import compiled as cs
+import crinton as cr
+import steve as st
+import gamblor as ga
+
+RANKS: int = len(c.STRAT_RANKS)
+CARD_RANK  = np.array(c.RANK, dtype=np.int8)
+DECK       = CARD_RANK[c.DECK]
+
+# Payout of a bet of one, and of a Gamblor side bet, per [middle, left, right] rank.
+STANDARD_PAYOUT = np.array(c.STANDARD_PAYOUT, dtype=np.int8)
+GAMBLOR_PAYOUT  = np.array(c.GAMBLOR_PAYOUT, dtype=np.int8)
+
+class StrategyTables:
+    ''' Compiled decision tables (see 'compiled.py') of every seat, stacked into
+        arrays with the seat first.
+            'left_ace'  [seat]                       -> rank
+            'right_ace' [seat, left]                 -> rank
+            'bet'       [seat, left, right]          -> bet size
+            'leftright' [seat, left, middle, right]  -> (new left, new right)
+            'side_bet'  [seat, left, right]          -> True for a Gamblor side bet
+    '''
+    def __init__(self, player_strategies: list[p.Strategy]) -> None:
+        tables: list[cs.CompiledStrategy] = [cs.compile_strategy(strategy) \
+                                             for strategy in player_strategies]
+        no_leftright: list = [[[(0, 0)]*RANKS]*len(c.RANK_NAMES)]*RANKS
+        no_side_bet: list  = [[0]*RANKS]*RANKS
+        self.left_ace: np.ndarray  = np.array([t.left_ace_rank for t in tables], dtype=np.int8)
+        self.right_ace: np.ndarray = np.array([t.right_ace_table for t in tables], dtype=np.int8)
+        self.bet: np.ndarray       = np.array([t.bet_table for t in tables], dtype=np.int64)
+        self.leftright: np.ndarray = np.array([no_leftright if t.leftright_table is None \
+                                               else t.leftright_table for t in tables],
+                                              dtype=np.int8)
+        self.side_bet: np.ndarray  = np.array([no_side_bet if t.side_bet_table is None \
+                                               else t.side_bet_table for t in tables]) == 1
+
+class GameDecks:
+    ''' Each game's decks from a Generator of its own, shuffled by
+        'main.shuffle_deck' as 'Game.deal_deck' shuffles CARDS, so a game of a
+        batch is dealt exactly what an OBJECT game with that Generator is. '''
+    def __init__(self, gtype: m.GameType, rngs: list[np.random.Generator]) -> None:
+        self.gtype: m.GameType              = gtype
+        self.rngs: list[np.random.Generator] = rngs
+        self.arg: list[np.ndarray | None]   = [None]*len(rngs)
+
+    def deal(self, game: int) -> np.ndarray:
+        ''' The ranks of 'game''s next deck. '''
+        deck, self.arg[game] = m.shuffle_deck(self.gtype, self.rngs[game], self.arg[game])
+        return CARD_RANK[deck]
+
+class BatchGames:
+    ''' Plays 'game_count' games in lockstep as integer NumPy arrays.
+            One row per game holds the pot, current seat, deck position, and the
+                remaining deck; one row per game and column per seat holds chips
+                and turns.
+            Each step every unfinished game advances one seat; seats with chips
+                take a turn, applying the deal, bet and payout rules of the
+                execution as masked array operations.
+            Decks hold card ranks only (suits never matter) and are dealt from
+                the end, as 'Game.deal_deck' pops from its shuffled list. They
+                are shuffled with 'rng', or dealt by 'decks' when it is given.
+            'recorder' records every turn to a turn log ('turnlog.py'), a step
+                of many games at a time; game ids follow the recorder's last.
+    '''
+    def __init__(self,
+                 gtype: m.GameType,
+                 execution: p.GameExecution,
+                 player_strategies: list[p.Strategy],
+                 game_count: int,
+                 player_ante: int,
+                 starting_chips: int,
+                 rng: np.random.Generator,
+                 decks: GameDecks | None = None,
+                 recorder: tl.TurnRecorder | None = None) \
+                 -> None:
+        if execution not in TURN_RULES:
+            raise ValueError(f'No batch rules for execution {execution.__name__}')
+        self.gtype: m.GameType        = gtype
+        self.turn_rules               = TURN_RULES[execution]
+        self.tables: StrategyTables   = StrategyTables(player_strategies)
+        self.rng: np.random.Generator = rng
+        self.game_count: int          = game_count
+        self.player_count: int        = len(player_strategies)
+        self.starting_chips: int      = starting_chips
+        self.min_count: int           = m.MIN_COUNT[gtype]
+        self.chips: np.ndarray = np.full((game_count, self.player_count),
+                                         starting_chips - player_ante, dtype=np.int64)
+        self.turns: np.ndarray = np.zeros((game_count, self.player_count), dtype=np.int64)
+        self.pot: np.ndarray   = np.full(game_count, player_ante*self.player_count,
+                                         dtype=np.int64)
+        self.seat: np.ndarray  = np.zeros(game_count, dtype=np.intp)
+        self.decks: GameDecks | None = decks
+        if decks is None:
+            shuffled: np.ndarray = rng.permuted(np.tile(DECK, (game_count, 1)), axis=1)
+            self.deck: np.ndarray = np.ascontiguousarray(shuffled[:, :len(DECK)-m.ARG_COUNT[gtype]])
+        else:
+            self.deck: np.ndarray = np.stack([decks.deal(game) for game in range(game_count)])
+        self.top: np.ndarray   = np.full(game_count, self.deck.shape[1], dtype=np.intp)
+        self.recorder: tl.TurnRecorder | None = recorder
+        self.first_game: int   = 0 if recorder is None else recorder.game + 1
+
+    def draw(self, games: np.ndarray) -> np.ndarray:
+        ''' Pops the top card of the deck of each of 'games'. '''
+        self.top[games] -= 1
+        return self.deck[games, self.top[games]]
+
+    def reshuffle(self, games: np.ndarray) -> None:
+        ''' Reshuffles the full deck (less the reserved cards) of each of 'games'. '''
+        if games.size:
+            if self.decks is None:
+                self.deck[games] = self.rng.permuted(self.deck[games], axis=1)
+            else:
+                for game in games.tolist():
+                    self.deck[game] = self.decks.deal(game)
+            self.top[games]  = self.deck.shape[1]
+
+    def deal_leftright(self, games: np.ndarray, seats: np.ndarray) \
+        -> tuple[np.ndarray, np.ndarray]:
+        ''' Deals left and right cards, ranks Aces by strategy, and orders them. '''
+        left:  np.ndarray = self.draw(games)
+        right: np.ndarray = self.draw(games)
+        sl: np.ndarray = np.where(left==c.ACE, self.tables.left_ace[seats], left)
+        sr: np.ndarray = np.where(right==c.ACE, self.tables.right_ace[seats, sl], right)
+        return np.minimum(sl, sr), np.maximum(sl, sr)
+
+    def choose_bet(self, games: np.ndarray, seats: np.ndarray,
+                   left: np.ndarray, right: np.ndarray) -> np.ndarray:
+        ''' Bets zero on a gap under two, else the strategy bet capped by the pot. '''
+        bet: np.ndarray = np.minimum(self.tables.bet[seats, left, right], self.pot[games])
+        return np.where(np.abs(right.astype(np.int64)-left) < 2, 0, bet)
+
+    def get_payout(self, games: np.ndarray, bet: np.ndarray,
+                   left: np.ndarray, right: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        ''' Pays one for a zero bet, otherwise draws a middle card for the bet.
+            Returns the payouts and the middle cards (-1 where none was drawn). '''
+        payout: np.ndarray = np.ones(games.size, dtype=np.int64)
+        middle: np.ndarray = np.full(games.size, -1, dtype=np.int8)
+        bets: np.ndarray   = np.flatnonzero(bet)
+        middle[bets]       = self.draw(games[bets])
+        payout[bets]       = bet[bets] * STANDARD_PAYOUT[middle[bets], left[bets], right[bets]]
+        return payout, middle
+
+    def play(self) -> tuple[np.ndarray, np.ndarray]:
+        ''' Plays every game until its pot empties, or as 'Game.play_game' ends
+            it with the pot unclaimed once no seat has chips to play for it.
+            Returns turns and chips won per game and seat. '''
+        games: np.ndarray = np.arange(self.game_count)
+        while games.size:
+            seats: np.ndarray   = self.seat[games]
+            playing: np.ndarray = self.chips[games, seats] > 0
+            self.seat[games]    = (seats+1) % self.player_count
+            tg: np.ndarray = games[playing]
+            ts: np.ndarray = seats[playing]
+            self.turns[tg, ts] += 1
+            self.reshuffle(tg[self.top[tg] < self.min_count])
+            self.turn_rules(self, tg, ts)
+            games = games[(self.pot[games] > 0) & (self.chips[games] > 0).any(axis=1)]
+        if self.recorder is not None:
+            self.recorder.game += self.game_count
+        return self.turns, self.chips - self.starting_chips
+
+    def record(self, games: np.ndarray, seats: np.ndarray,
+               left: np.ndarray, middle: np.ndarray, right: np.ndarray,
+               bet: np.ndarray, payout: np.ndarray, total: np.ndarray,
+               second: tuple[np.ndarray, ...] | None = None) -> None:
+        ''' Records a step's turns before their payouts are made. 'payout' is
+            each player's payout from all its bets, 'total' the turn's payouts
+            to every seat, and 'second' (Steve) holds the indices of the turns
+            with a second bet and that bet's left, middle, right, bet and payout. '''
+        records: np.ndarray = np.zeros(games.size, dtype=tl.TURN_RECORD)
+        records['game']       = self.first_game + games
+        records['seat']       = seats
+        records['left']       = left
+        records['middle']     = middle
+        records['right']      = right
+        records['left2']      = tl.NO_CARD
+        records['middle2']    = tl.NO_CARD
+        records['right2']     = tl.NO_CARD
+        records['bet']        = bet
+        records['payout']     = payout
+        records['side']       = total - payout
+        records['pot_before'] = self.pot[games]
+        records['pot_after']  = self.pot[games] - total
+        if second is not None:
+            again, left2, middle2, right2, bet2, payout2 = second
+            records['left2'][again]    = left2
+            records['middle2'][again]  = middle2
+            records['right2'][again]   = right2
+            records['bet2'][again]     = bet2
+            records['payout2'][again]  = payout2
+            records['payout'][again]  -= payout2
+        self.recorder.record_turns(records)
+
+def crinton_turn(games: BatchGames, tg: np.ndarray, ts: np.ndarray) -> None:
+    ''' Crinton turn: one bet by the current player. '''
+    left, right = games.deal_leftright(tg, ts)
+    bet: np.ndarray = games.choose_bet(tg, ts, left, right)
+    payout, middle = games.get_payout(tg, bet, left, right)
+    if games.recorder is not None:
+        games.record(tg, ts, left, middle, right, bet, payout, payout)
+    games.chips[tg, ts] += payout
+    games.pot[tg]       -= payout
+
+def steve_turn(games: BatchGames, tg: np.ndarray, ts: np.ndarray) -> None:
+    ''' Steve turn: after a Crinton bet with a middle card, a second bet on the
+        gap chosen by 'steve_choose_leftright'. As in 'SteveExecution', the second
+        bet is capped by the pot from before the turn. '''
+    left, right = games.deal_leftright(tg, ts)
+    bet: np.ndarray = games.choose_bet(tg, ts, left, right)
+    payout, middle = games.get_payout(tg, bet, left, right)
+    again: np.ndarray = np.flatnonzero(bet)
+    second: tuple[np.ndarray, ...] | None = None
+    if again.size:
+        ag, aseats = tg[again], ts[again]
+        nlr: np.ndarray = games.tables.leftright[aseats, left[again], middle[again], right[again]]
+        nl, nr   = nlr[:, 0], nlr[:, 1]
+        bet2: np.ndarray = games.choose_bet(ag, aseats, nl, nr)
+        payout2, middle2 = games.get_payout(ag, bet2, nl, nr)
+        payout[again] += payout2
+        second = (again, nl, middle2, nr, bet2, payout2)
+    if games.recorder is not None:
+        games.record(tg, ts, left, middle, right, bet, payout, payout, second)
+    games.chips[tg, ts] += payout
+    games.pot[tg]       -= payout
+
+def gamblor_turn(games: BatchGames, tg: np.ndarray, ts: np.ndarray) -> None:
+    ''' Gamblor turn: after a Crinton bet with a middle card, every other player
+        may bet one on missing the gap. Winning side bets are paid left to right
+        while the pot (before the turn, less payouts so far) covers them.
+        Every side bet of a game's turn pays the same, so the bets are resolved
+        as one [game, seat] array: a winning bet is paid when its count among
+        the game's winning bets, from the left, is within what the pot covers. '''
+    left, right = games.deal_leftright(tg, ts)
+    bet: np.ndarray = games.choose_bet(tg, ts, left, right)
+    payout, middle = games.get_payout(tg, bet, left, right)
+    games.chips[tg, ts] += payout
+    opayout: np.ndarray = payout.copy()
+    sides: np.ndarray   = np.flatnonzero(bet)
+    if sides.size:
+        sg, sst = tg[sides], ts[sides]
+        sl, sm, sr = left[sides], middle[sides], right[sides]
+        side_payout: np.ndarray = GAMBLOR_PAYOUT[sm, sl, sr]
+        bets: np.ndarray = games.tables.side_bet[:, sl, sr].T
+        bets[np.arange(sides.size), sst] = False
+        covered: np.ndarray = np.maximum(games.pot[sg] - opayout[sides], 0)//np.abs(side_payout)
+        applied: np.ndarray = bets & ((side_payout < 0)[:, None] | \
+                                      (np.cumsum(bets, axis=1) <= covered[:, None]))
+        games.chips[sg] += applied*side_payout[:, None]
+        opayout[sides]  += applied.sum(axis=1)*side_payout
+    if games.recorder is not None:
+        games.record(tg, ts, left, middle, right, bet, payout, opayout)
+    games.pot[tg] -= opayout
+
+TURN_RULES = {cr.CrintonExecution: crinton_turn,
+              st.SteveExecution:   steve_turn,
+              ga.GamblorExecution: gamblor_turn}
+
+def play_batch(gtype: m.GameType,
+               execution: p.GameExecution,
+               player_strategies: list[p.Strategy],
+               game_count: int,
+               player_ante: int,
+               starting_chips: int,
+               rng: np.random.Generator) \
+               -> tuple[np.ndarray, np.ndarray]:
+    ''' Plays 'game_count' games with the batch engine. Returns (turns, chips won),
+        each an int array with a row per game and a column per seat. '''
+    return BatchGames(gtype=gtype,
+                      execution=execution,
+                      player_strategies=player_strategies,
+                      game_count=game_count,
+                      player_ante=player_ante,
+                      starting_chips=starting_chips,
+                      rng=rng).play()
@@ -0,0 +1,178 @@
+''' Throughput benchmarks and regression checks.
+        Game benchmarks play seeded games of every GameType at several player
+            counts, on the OBJECT engine and on the BATCH engine, and report
+            turns and games per second.
+        Micro benchmarks call the hot functions of a turn in a loop over
+            precomputed inputs and report calls per second.
+        Every figure is the best of 'repeat' runs, which is the least noisy.
+            'run' saves them as a JSON baseline; 'compare' runs again and flags
+            every figure that fell more than 'threshold' below the baseline.
+    For example:
+        python benchmark.py run --output baseline.json
+        python benchmark.py compare baseline.json --threshold 0.1 '''
+import argparse
+import json
+import platform
+import sys
+import time
+from collections.abc import Callable
+import numpy as np
+import cards as c
+import main as m
+import crinton as cr
+import steve as st
+import strategies as s
+import executions as ex
+from player import Player
+
+PLAYER_COUNTS: tuple[int, ...] = (3, 5, 7)
+GAME_COUNT: int  = 2000
+CALLS: int       = 20000
+REPEAT: int      = 3
+THRESHOLD: float = 0.1
+SEED: int        = 0
+
+def best_time(run: Callable[[], object], repeat: int) -> float:
+    ''' Shortest wall time of 'repeat' calls of 'run'. '''
+    times: list[float] = []
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def game_benchmarks(player_counts: tuple[int, ...] = PLAYER_COUNTS, game_count: int = GAME_COUNT,
+                    repeat: int = REPEAT, engine: m.Engine = m.Engine.OBJECT) -> dict[str, float]:
+    ''' Turns and games per second of seeded games on 'engine'. OBJECT figures
+        are named by game type and players alone, BATCH ones also by engine. '''
+    results: dict[str, float] = {}
+    suffix: str = '' if engine == m.Engine.OBJECT else f' {engine}'
+    for gtype, (execution, strategy) in m.GAMES.items():
+        for player_count in player_counts:
+            play = lambda: m.play_games(gtype=gtype,
+                                        player_count=player_count,
+                                        game_count=game_count,
+                                        player_ante=4,
+                                        execution=execution,
+                                        player_strategies=[strategy()]*player_count,
+                                        engine=engine,
+                                        rng=np.random.default_rng(SEED))
+            turns: int = sum(play().turns)
+            seconds: float = best_time(play, repeat)
+            results[f'{gtype}/{player_count}p{suffix} turns/s'] = turns/seconds
+            results[f'{gtype}/{player_count}p{suffix} games/s'] = game_count/seconds
+    return results
+
+def execution(gtype: m.GameType, player_count: int = 5, pot: int = 1000000):
+    ''' An execution for seat 0 of a fresh table, with a pot no bet empties. '''
+    executor, strategy = m.GAMES[gtype]
+    players: list[Player] = [Player(chips=m.STARTING_CHIPS, strategy=strategy())
+                             for _ in range(player_count)]
+    return executor(players[0], players, pot)
+
+def cards(count: int, rng: np.random.Generator) -> list[int]:
+    ''' 'count' cards from shuffled decks, for executions to pop. '''
+    decks: np.ndarray = np.concatenate([rng.permutation(c.DECK) for _ in range(-(-count//52))])
+    return decks[:count].tolist()
+
+def micro_benchmarks(calls: int = CALLS, repeat: int = REPEAT) -> dict[str, float]:
+    ''' Calls per second of the hot functions of a turn. '''
+    rng: np.random.Generator = np.random.default_rng(SEED)
+    ranks: list[tuple[int, int, int]] = [(c.ACE if rng.random() < 0.5 else int(rng.integers(1, 13)),
+                                          int(rng.integers(0, 14)), int(rng.integers(0, 14)))
+                                         for _ in range(calls)]
+    ordered: list[tuple[int, int, int]] = [(int(rng.integers(1, 13)), *sorted((left, right)))
+                                           for _, left, right in ranks]
+    deck: list[int] = cards(3*calls, rng)
+    steve: st.SteveStrategy = st.SteveStrategy()
+    crinton = execution(m.GameType.CRINTON)
+    gamblor = execution(m.GameType.GAMBLOR)
+    game: m.Game = m.Game(gtype=m.GameType.CRINTON,
+                          execution=cr.CrintonExecution,
+                          players=[Player(chips=m.STARTING_CHIPS, strategy=cr.CrintonStrategy())
+                                   for _ in range(5)],
+                          player_ante=4,
+                          rng=np.random.default_rng(SEED))
+    def srank() -> None:
+        for middle, left, right in ranks:
+            s.srank(middle, (left, right))
+    def crinton_execute() -> None:
+        cards: list[int] = deck.copy()
+        for _ in range(calls):
+            ex.crinton_execute(crinton, cards)
+    def deal_deck() -> None:
+        for _ in range(calls//10):
+            game.deal_deck()
+    def gamblor_execute() -> None:
+        cards: list[int] = deck.copy()
+        for _ in range(calls):
+            gamblor.execute(cards)
+    def choose_left_gap() -> None:
+        for middle, left, right in ordered:
+            steve.choose_left_gap(left, middle, right)
+    return {'strategies.srank calls/s':           calls/best_time(srank, repeat),
+            'executions.crinton_execute calls/s': calls/best_time(crinton_execute, repeat),
+            'main.Game.deal_deck calls/s':        (calls//10)/best_time(deal_deck, repeat),
+            'GamblorExecution.execute calls/s':   calls/best_time(gamblor_execute, repeat),
+            'SteveStrategy.choose_left_gap calls/s': calls/best_time(choose_left_gap, repeat)}
+
+def run_benchmarks(player_counts: tuple[int, ...] = PLAYER_COUNTS, game_count: int = GAME_COUNT,
+                   calls: int = CALLS, repeat: int = REPEAT) -> dict:
+    ''' Every benchmark, with the platform they ran on. '''
+    return {'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'engine_version': m.ENGINE_VERSION,
+            'results': {**game_benchmarks(player_counts, game_count, repeat),
+                        **game_benchmarks(player_counts, game_count, repeat, m.Engine.BATCH),
+                        **micro_benchmarks(calls, repeat)}}
+
+def compare(baseline: dict, current: dict, threshold: float = THRESHOLD) -> list[str]:
+    ''' Displays every figure against its baseline and returns the names of
+        those more than 'threshold' (a fraction) slower. '''
+    regressions: list[str] = []
+    width: int = max(len(name) for name in current['results'])
+    for name, rate in current['results'].items():
+        base: float | None = baseline['results'].get(name)
+        if base is None:
+            print(f'{name:<{width}} {rate:14,.0f}   (no baseline)')
+            continue
+        change: float = rate/base - 1
+        flag: str = ''
+        if change < -threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f'{name:<{width}} {rate:14,.0f} {base:14,.0f} {change:+8.1%}{flag}')
+    return regressions
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the simulator against a JSON baseline.')
+    parser.add_argument('mode', choices=['run', 'compare'])
+    parser.add_argument('baseline', nargs='?', help='baseline JSON to compare against')
+    parser.add_argument('--output', help='write results as a JSON baseline')
+    parser.add_argument('--players', nargs='+', type=int, default=list(PLAYER_COUNTS))
+    parser.add_argument('--games', type=int, default=GAME_COUNT)
+    parser.add_argument('--calls', type=int, default=CALLS)
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help='fraction slower than the baseline that counts as a regression')
+    args = parser.parse_args(argv)
+    if args.mode == 'compare' and args.baseline is None:
+        parser.error('compare needs a baseline')
+    current: dict = run_benchmarks(tuple(args.players), args.games, args.calls, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+    if args.mode == 'run':
+        width: int = max(len(name) for name in current['results'])
+        for name, rate in current['results'].items():
+            print(f'{name:<{width}} {rate:14,.0f}')
+        return 0
+    with open(args.baseline) as f:
+        regressions: list[str] = compare(json.load(f), current, args.threshold)
+    print(f'{len(regressions)} regression(s) beyond {args.threshold:.0%}')
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
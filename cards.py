@@ -0,0 +1,72 @@
+''' Integer card encoding.
+        A card is an int 0..51, 4*(index in CARD_RANKS) + suit, in the order
+            'Game.deal_deck' has always built its deck: 2S 2C 2H 2D 3S ... AD.
+        A rank is an int: its index in STRAT_RANKS ('L'=0, '2'=1 ... 'K'=12,
+            'H'=13), or ACE (14) for an Ace not yet ranked low or high.
+    Every (card, left, right) question a turn asks is a lookup in the tables
+    below, indexed [middle rank][left rank][right rank]. '''
+import numpy as np
+
+STRAT_RANKS = 'L23456789TJQKH'
+CARD_RANKS  = '23456789TJQKA'
+RANK_NAMES  = STRAT_RANKS + 'A'
+
+L: int   = STRAT_RANKS.index('L')
+H: int   = STRAT_RANKS.index('H')
+ACE: int = RANK_NAMES.index('A')
+ENDS     = (L, H)
+
+# Payout per chip bet: a win, a loss, and a post (middle card matches an end).
+WIN: int  = 1
+LOSE: int = -1
+POST: int = -2
+
+DECK = np.arange(4*len(CARD_RANKS), dtype=np.int8)
+
+RANK: list[int] = [RANK_NAMES.index(CARD_RANKS[card//4]) for card in range(len(DECK))]
+
+def _srank(cr: int, left: int, right: int) -> int:
+    ''' Contextual rank of cr between ranked left and right cards. An Ace matches
+        an Ace on the left or right; otherwise it is L or H, whichever maximizes
+        the gap to the furthest of left and right (for Steve purposes). '''
+    if cr != ACE:
+        return cr
+    if left in ENDS:
+        return left
+    if right in ENDS:
+        return right
+    return H if 13-left >= right else L
+
+def _standard_payout(middle: int, left: int, right: int) -> int:
+    ''' Crinton result of a middle card, WIN when in between; a middle Ace
+        always ranks low. '''
+    sm: int = L if middle == ACE else middle
+    if sm == L and ((left in ENDS) or (right in ENDS)):
+        return POST
+    if sm in (left, right):
+        return POST
+    if left < sm < right:
+        return WIN
+    return LOSE
+
+def _gamblor_payout(middle: int, left: int, right: int) -> int:
+    ''' Gamblor side bet result of a middle card, LOSE when in between: the side
+        bettor wins when the middle card misses the gap. '''
+    sm: int = _srank(middle, left, right)
+    if sm in ENDS and ((left in ENDS) or (right in ENDS)):
+        return POST
+    if left < sm < right:
+        return LOSE
+    if sm in (left, right):
+        return POST
+    return WIN
+
+def _table(rule) -> list[list[list[int]]]:
+    return [[[rule(cr, left, right) for right in range(len(STRAT_RANKS))] \
+             for left in range(len(STRAT_RANKS))] for cr in range(len(RANK_NAMES))]
+
+SRANK: list[list[list[int]]]           = _table(_srank)
+STANDARD_PAYOUT: list[list[list[int]]] = _table(_standard_payout)
+GAMBLOR_PAYOUT: list[list[list[int]]]  = _table(_gamblor_payout)
+GAP: list[list[int]] = [[abs(right-left) for right in range(len(STRAT_RANKS))] \
+                        for left in range(len(STRAT_RANKS))]
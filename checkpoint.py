@@ -0,0 +1,124 @@
+''' Checkpoints of long runs.
+        A checkpoint holds the arguments of a shard of 'main.play_games', the
+            games completed, the accumulated Analysis and the state of the
+            shard's random generator. It is pickled to a temporary file and
+            renamed over the last one, so a crash never leaves a torn file.
+        'resume_analysis' continues every shard from its checkpoint; since the
+            generator picks up where it stopped and games are recorded into the
+            same Analysis, the result is the one the uninterrupted run gives.
+        'merge_checkpoints' combines the checkpoints of runs made elsewhere
+            (with different seeds) into one Analysis. '''
+import os
+import pickle
+import numpy as np
+import analysis as an
+import compiled as cs
+import main as m
+
+CHECKPOINT_GAMES: int = 1000000
+VERSION: int          = 1
+
+def shard_paths(checkpoint_path: str, workers: int) -> list[str]:
+    ''' The checkpoint of each worker's shard. '''
+    return [checkpoint_path] if workers == 1 else [f'{checkpoint_path}.{w}' for w in range(workers)]
+
+def write_checkpoint(path: str, checkpoint: dict) -> None:
+    ''' Writes 'checkpoint' to 'path' atomically. '''
+    temporary: str = f'{path}.tmp'
+    with open(temporary, 'wb') as f:
+        pickle.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+def read_checkpoint(path: str) -> dict:
+    with open(path, 'rb') as f:
+        checkpoint: dict = pickle.load(f)
+    if checkpoint.get('version') != VERSION:
+        raise ValueError(f'{path} is not a version {VERSION} checkpoint')
+    return checkpoint
+
+def play_checkpointed(games: dict, path: str, checkpoint_games: int, workers: int,
+                      rng_state: dict, done: int = 0,
+                      analysis: an.Analysis | None = None) -> an.Analysis:
+    ''' Plays the 'games' arguments of 'main.play_games' from game 'done' on,
+        with a generator in 'rng_state', checkpointing to 'path' before the
+        first game and after every 'checkpoint_games' games. For the batch engine
+        the interval is rounded up to whole batches, so batches fall where an
+        uninterrupted run puts them. '''
+    if games['engine'] == m.Engine.BATCH:
+        checkpoint_games = -(-checkpoint_games//games['batch_size'])*games['batch_size']
+    rng: np.random.Generator = np.random.default_rng()
+    rng.bit_generator.state = rng_state
+    while True:
+        write_checkpoint(path, {'version': VERSION,
+                                'games': games,
+                                'workers': workers,
+                                'checkpoint_games': checkpoint_games,
+                                'done': done,
+                                'rng_state': rng.bit_generator.state,
+                                'analysis': analysis})
+        if done == games['game_count']:
+            return analysis
+        count: int = min(checkpoint_games, games['game_count'] - done)
+        analysis = m.play_games(**{**games, 'game_count': count}, rng=rng, analysis=analysis)
+        done += count
+
+def resume_analysis(checkpoint_path: str) -> an.Analysis:
+    ''' Continues the run checkpointed at 'checkpoint_path' (by 'run_analysis'
+        with the same path) to the end, then displays and returns its Analysis.
+        Shards of a multi-worker run resume in as many processes. '''
+    first: str = checkpoint_path if os.path.exists(checkpoint_path) else f'{checkpoint_path}.0'
+    workers: int = read_checkpoint(first)['workers']
+    shards: list[tuple] = []
+    for path in shard_paths(checkpoint_path, workers):
+        checkpoint: dict = read_checkpoint(path)
+        shards.append((checkpoint['games'], path, checkpoint['checkpoint_games'], workers,
+                       checkpoint['rng_state'], checkpoint['done'], checkpoint['analysis']))
+    with m.worker_pool(workers) as pool:
+        results: list[an.Analysis] = [play_checkpointed(*shards[0])] if pool is None \
+                                     else pool.starmap(play_checkpointed, shards)
+    analysis: an.Analysis = results[0]
+    for result in results[1:]:
+        analysis.merge(result)
+    analysis.display_results()
+    return analysis
+
+def run_config(games: dict) -> dict:
+    ''' What runs must share to be merged: the game, table, ante, starting
+        chips, engine and every seat's strategy fingerprint ('compiled.py'). '''
+    return {'gtype':          games['gtype'],
+            'player_count':   games['player_count'],
+            'player_ante':    games['player_ante'],
+            'starting_chips': games['starting_chips'],
+            'engine':         games['engine'],
+            'strategies':     [cs.compile_strategy(strategy).fingerprint
+                               for strategy in games['player_strategies']]}
+
+def merge_checkpoints(paths: list[str]) -> an.Analysis:
+    ''' Merges the Analyses of checkpoints, finished or not, of the same
+        'run_config'; displays and returns the result. Runs on different
+        machines need different seeds, or their games repeat each other. '''
+    analysis: an.Analysis | None = None
+    config: dict | None = None
+    for path in paths:
+        checkpoint: dict = read_checkpoint(path)
+        if config is None:
+            config = run_config(checkpoint['games'])
+        else:
+            differences: list[str] = [f'{field} {value} (not {config[field]})'
+                                      for field, value in run_config(checkpoint['games']).items()
+                                      if value != config[field]]
+            if differences:
+                raise ValueError(f'{path} is a different run: {", ".join(differences)}')
+        result: an.Analysis | None = checkpoint['analysis']
+        if result is None:
+            continue
+        if analysis is None:
+            analysis = result
+        else:
+            analysis.merge(result)
+    if analysis is None:
+        raise ValueError('No games played in any checkpoint')
+    analysis.display_results()
+    return analysis
@@ -0,0 +1,139 @@
+''' Strategy (or game type) comparisons with common random numbers.
+        Every arm plays the same deals: game g of every arm shuffles with its
+            own stream, spawned from the run's seed with key g, so the decks
+            dealt to one arm are the decks dealt to every other.
+        With 'rotate' the arm's strategy takes every seat in turn against the
+            field strategy, on the same deals, so seat position cancels out.
+        Arms are compared by their paired difference per deal, whose standard
+            error is far below that of two independent runs. '''
+from typing import NamedTuple
+import numpy as np
+import analysis as an
+import main as m
+import protocols as p
+from player import Player
+
+class Arm(NamedTuple):
+    ''' One side of a comparison: 'strategy' plays the measured seat and 'field'
+        every other seat. '''
+    gtype: m.GameType
+    execution: p.GameExecution
+    strategy: p.Strategy
+    field: p.Strategy
+
+class Comparison(NamedTuple):
+    ''' Results per arm for the measured seat, averaged over seats with rotation:
+            'chips'/'roi': chips won per deal and per turn.
+            'difference'/'stderr': paired chips won per deal against arm 0.
+            'games': games played per arm.
+            'variance_reduction': games per arm that two independent runs (one
+                seat, separate decks) would need for the same stderr, over
+                'games'; estimated from the spread of single games. '''
+    arms: list[Arm]
+    deals: int
+    chips: list[float]
+    roi: list[float]
+    difference: list[float]
+    stderr: list[float]
+    games: int
+    variance_reduction: list[float]
+
+def play_arm(arm: Arm, player_count: int, player_ante: int, seat: int,
+             rng: np.random.Generator) -> tuple[int, int]:
+    ''' Chips won and turns of 'seat' in one game of 'arm'. '''
+    players: list[Player] = [Player(chips=m.STARTING_CHIPS,
+                                    strategy=arm.strategy if s == seat else arm.field)
+                             for s in range(player_count)]
+    game: m.Game = m.Game(gtype=arm.gtype,
+                          execution=arm.execution,
+                          players=players,
+                          player_ante=player_ante,
+                          rng=rng)
+    return game.chips_won()[seat], players[seat].turns
+
+def play_deals(arms: list[Arm], player_count: int, player_ante: int, entropy: int,
+               deals: range, seats: list[int]) -> tuple[an.BatchMeans, an.BatchMeans]:
+    ''' Plays every arm in every seat of 'seats' on each deal of 'deals'.
+        Statistics per deal, averaged over seats: each arm's chips won, then
+        each arm's turns, then each arm's chips won less arm 0's. Also returns
+        each arm's chips won per single game. '''
+    stats: an.BatchMeans = an.BatchMeans(3*len(arms) - 1)
+    games: an.BatchMeans = an.BatchMeans(len(arms))
+    for deal in deals:
+        won: list[list[int]]  = [[0]*len(arms) for _ in seats]
+        turns: list[float]    = [0.0]*len(arms)
+        for a, arm in enumerate(arms):
+            for i, seat in enumerate(seats):
+                rng = np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(deal,)))
+                won[i][a], played = play_arm(arm, player_count, player_ante, seat, rng)
+                turns[a] += played/len(seats)
+        chips: list[float] = [sum(row[a] for row in won)/len(seats) for a in range(len(arms))]
+        stats.add(chips + turns + [chips[a] - chips[0] for a in range(1, len(arms))])
+        for row in won:
+            games.add(row)
+    return stats, games
+
+def run_deals(arms: list[Arm], player_count: int, player_ante: int, entropy: int,
+              deals: range, seats: list[int], workers: int = 1, pool=None) \
+    -> tuple[an.BatchMeans, an.BatchMeans]:
+    ''' 'play_deals', with the deals split across the 'workers' processes of
+        'pool' if one is given, and the results merged in deal order. '''
+    starts: list[int] = (deals.start + np.cumsum([0] + m.shard_counts(len(deals), workers))).tolist()
+    shards: list[tuple] = [(arms, player_count, player_ante, entropy, range(start, stop), seats)
+                           for start, stop in zip(starts, starts[1:])]
+    results: list[tuple[an.BatchMeans, an.BatchMeans]] = \
+        [play_deals(*shards[0])] if pool is None else pool.starmap(play_deals, shards)
+    stats, games = results[0]
+    for result, result_games in results[1:]:
+        stats.merge(result)
+        games.merge(result_games)
+    return stats, games
+
+def compare_arms(arms: list[Arm],
+                 player_count: int,
+                 deal_count: int,
+                 player_ante: int,
+                 rotate: bool = True,
+                 seed: int | None = None,
+                 workers: int = 1) -> Comparison:
+    ''' Plays 'deal_count' deals of every arm (times 'player_count' with
+        'rotate', else in seat 0 only), displays and returns the Comparison.
+        Deals are split across 'workers' processes; a deal plays the same
+        whatever the worker count. '''
+    if len(arms) < 2:
+        raise ValueError(f'A comparison needs at least two arms, not {len(arms)}')
+    entropy: int = np.random.SeedSequence(seed).entropy
+    seats: list[int] = list(range(player_count)) if rotate else [0]
+    with m.worker_pool(workers) as pool:
+        stats, games = run_deals(arms, player_count, player_ante, entropy,
+                                 range(deal_count), seats, workers, pool)
+    comparison: Comparison = comparison_of(arms, stats, games)
+    display_comparison(comparison)
+    return comparison
+
+def comparison_of(arms: list[Arm], stats: an.BatchMeans, games: an.BatchMeans) -> Comparison:
+    ''' The Comparison of the statistics 'play_deals' returns. '''
+    n: int = len(arms)
+    stderr: list[float] = stats.stderr()
+    return Comparison(arms=arms,
+                      deals=stats.batches,
+                      chips=stats.mean[:n],
+                      roi=[chips/turns if turns else 0.0 \
+                           for chips, turns in zip(stats.mean[:n], stats.mean[n:2*n])],
+                      difference=[0.0] + stats.mean[2*n:],
+                      stderr=[0.0] + stderr[2*n:],
+                      games=games.batches,
+                      variance_reduction=[1.0] + \
+                          [(games.variance(0) + games.variance(a)) \
+                           / stderr[2*n+a-1]**2 / games.batches \
+                           if stderr[2*n+a-1] else np.inf for a in range(1, n)])
+
+def display_comparison(comparison: Comparison) -> None:
+    print(f'Deals: {comparison.deals}\t\tGames per arm: {comparison.games}')
+    for a, arm in enumerate(comparison.arms):
+        name: str = f'{arm.gtype} {arm.strategy.name} vs {arm.field.name}'
+        diff: str = '' if a == 0 else f'\tvs arm 0: {comparison.difference[a]:8.4f}' \
+                                      f' +/- {comparison.stderr[a]:.4f}' \
+                                      f' (variance reduction {comparison.variance_reduction[a]:.1f}x)'
+        print(f'Arm {a}  {name}  Chips Won/g: {comparison.chips[a]:8.4f}'
+              f' ROI/t: {comparison.roi[a]:10.5f}' + diff)
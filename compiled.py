@@ -0,0 +1,96 @@
+''' Strategies compiled into dense decision tables.
+        'compile_strategy' calls each Strategy method once per possible input and
+            keeps the answers in lists indexed by rank (see 'cards.py'), so every
+            decision of a turn is a lookup.
+        A CompiledStrategy satisfies the Strategy protocol: its methods answer
+            from the tables, so code written against Strategy runs on either. '''
+import contextlib
+import hashlib
+import json
+import cards as c
+import protocols as p
+from strategies import Rank
+
+RANKS: int = len(c.STRAT_RANKS)
+
+class CompiledStrategy:
+    ''' Decision tables of a strategy.
+            'left_ace_rank'                            -> rank for a left Ace
+            'right_ace_table' [left]                   -> rank for a right Ace
+            'bet_table'       [left][right]            -> bet size
+            'leftright_table' [left][middle][right]    -> Steve's (left, right), or None
+            'side_bet_table'  [left][right]            -> Gamblor side bet, or None
+        'fingerprint' is the SHA-256 of the tables: strategies that decide
+            alike share it, whatever their class or name.
+    '''
+    def __init__(self, strategy: p.Strategy) -> None:
+        self.strategy: p.Strategy = strategy
+        self.name: str            = strategy.name
+        self.left_ace_rank: Rank  = strategy.left_ace()
+        self.right_ace_table: list[Rank] = [strategy.right_ace(left=left) for left in range(RANKS)]
+        self.bet_table: list[list[int]]  = [[strategy.bet_strategy(left, right) \
+                                             for right in range(RANKS)] for left in range(RANKS)]
+        self.leftright_table: list[list[list[tuple[Rank, Rank]]]] | None = None
+        self.side_bet_table: list[list[int]] | None = None
+        if hasattr(strategy, 'steve_choose_leftright'):
+            self.leftright_table = [[[tuple(strategy.steve_choose_leftright(left, middle, right)) \
+                                      for right in range(RANKS)] \
+                                     for middle in range(len(c.RANK_NAMES))] \
+                                    for left in range(RANKS)]
+        if hasattr(strategy, 'default_gamblor_strategy'):
+            self.side_bet_table = [[strategy.default_gamblor_strategy(left, right) \
+                                    for right in range(RANKS)] for left in range(RANKS)]
+        tables: str = json.dumps([self.left_ace_rank, self.right_ace_table, self.bet_table,
+                                  self.leftright_table, self.side_bet_table], default=int)
+        self.fingerprint: str = hashlib.sha256(tables.encode()).hexdigest()
+
+    def left_ace(self, left: Rank=None) -> Rank:
+        return self.left_ace_rank
+    def right_ace(self, left: Rank) -> Rank:
+        return self.right_ace_table[left]
+    def bet_strategy(self, left: Rank, right: Rank) -> int:
+        return self.bet_table[left][right]
+    def steve_choose_leftright(self, left: Rank, middle: Rank, right: Rank) -> tuple[Rank, Rank]:
+        return self.leftright_table[left][middle][right]
+    def default_gamblor_strategy(self, left: Rank, right: Rank) -> int:
+        return self.side_bet_table[left][right]
+
+def compile_strategy(strategy: p.Strategy) -> CompiledStrategy:
+    ''' Compiles a strategy once; compiling it again returns the same tables.
+        They are kept on the strategy as '_compiled', so they live as long as
+        it does; a strategy that cannot take the attribute is compiled every
+        time. A CompiledStrategy compiles to itself. '''
+    if isinstance(strategy, CompiledStrategy):
+        return strategy
+    compiled: CompiledStrategy | None = getattr(strategy, '_compiled', None)
+    if compiled is None:
+        compiled = CompiledStrategy(strategy)
+        with contextlib.suppress(AttributeError):
+            strategy._compiled = compiled
+    return compiled
+
+def verify_compiled(compiled: CompiledStrategy) -> list[str]:
+    ''' Checks every entry of the tables against the original strategy's methods,
+        on every input. Returns a description of each mismatch; none means the
+        tables decide exactly as the strategy does. '''
+    strategy: p.Strategy = compiled.strategy
+    mismatches: list[str] = []
+    def check(what: str, table, method) -> None:
+        if table != method:
+            mismatches.append(f'{what}: table {table}, strategy {method}')
+    check('left_ace()', compiled.left_ace(), strategy.left_ace())
+    for left in range(RANKS):
+        check(f'right_ace({left})', compiled.right_ace(left), strategy.right_ace(left=left))
+        for right in range(RANKS):
+            check(f'bet_strategy({left}, {right})', compiled.bet_strategy(left, right),
+                  strategy.bet_strategy(left, right))
+            if compiled.side_bet_table is not None:
+                check(f'default_gamblor_strategy({left}, {right})',
+                      compiled.default_gamblor_strategy(left, right),
+                      strategy.default_gamblor_strategy(left, right))
+            if compiled.leftright_table is not None:
+                for middle in range(len(c.RANK_NAMES)):
+                    check(f'steve_choose_leftright({left}, {middle}, {right})',
+                          compiled.steve_choose_leftright(left, middle, right),
+                          tuple(strategy.steve_choose_leftright(left, middle, right)))
+    return mismatches
@@ -17,9 +17,11 @@ class CrintonExecution(GameExecution):
     ''' Initial Crinton turn execution.
             Handles main player with default strategies.
     '''
-    def execute(self, deck: list[str]) -> tuple[dict[int,int], list[str]]:
-        payouts: dict[int,int]
-        payouts, _, _, _, deck, _ = ex.crinton_execute(self, deck)
+    def execute(self, deck: list[int]) -> tuple[list[int], list[int]]:
+        payouts: list[int]
+        payouts, left, middle, right, deck, bet = ex.crinton_execute(self, deck)
+        if self.recorder is not None:
+            self.recorder.record(self, payouts, left, middle, right, bet, payouts[self.seat])
         return payouts, deck
     deal_leftright = ex.default_deal_leftright
     choose_bet     = ex.default_choose_bet
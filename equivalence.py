@@ -0,0 +1,475 @@
+''' Validation of engines against the reference rules.
+        The reference executions below play a turn straight from the rules and
+            the players' Strategy methods: no compiled tables ('compiled.py'),
+            no rule tables ('cards.py') and no reused payout ledger, with Aces
+            ranked by 'reference_srank', the original string-era logic.
+        Three checks, each given a reference and a candidate Setup:
+            'replay' plays both on the same seeded decks with turn logs
+                ('turnlog.py') and finds the first turn where they differ.
+                Each game shuffles with a stream of its own, so a BATCH side is
+                dealt what an OBJECT one is ('batch.GameDecks'). Both sides need
+                one deck model.
+            'compare_distributions' plays both on independent decks and tests
+                every seat's chips won per game for equal means (Welch) and equal
+                distributions (two-sample Kolmogorov-Smirnov on the Analysis
+                histograms). Any engine or deck model can be tested this way.
+            'check_archive' tests a Setup's chips and turns per game against the
+                original engine's 100M-game results ('steve.OLD_SCHOOL'). Only
+                Crinton's still hold: the Steve and Gamblor runs predate the
+                rules of this tree (the first commit already plays about 25% and
+                50% more turns per game), so 'validate' displays their checks
+                without failing on them.
+        Each check passes when its smallest p-value is at least 'alpha' over
+            the number of tests it made (Bonferroni).
+    Run as a script to validate every engine and deck model:
+        python equivalence.py --sample-games 200000 --archive-games 1000000 --workers 8 '''
+import argparse
+import os
+import re
+import sys
+import tempfile
+from math import exp, sqrt
+from statistics import NormalDist
+from typing import NamedTuple
+import numpy as np
+import analysis as an
+import batch as bt
+import cards as c
+import main as m
+import steve as st
+import optimizer as op
+import turnlog as tl
+import protocols as p
+from protocols import GameExecution
+from player import Player
+from strategies import Rank
+
+ALPHA: float         = 0.001
+PLAYER_COUNT: int    = 5
+PLAYER_ANTE: int     = 4
+REPLAY_GAMES: int    = 2000
+SAMPLE_GAMES: int    = 100000
+ARCHIVE_GAMES: int   = 400000
+ARCHIVE_BATCHES: int = 40
+# Game types whose archived results were played under the current rules.
+ARCHIVE_RULES: tuple[m.GameType, ...] = (m.GameType.CRINTON,)
+
+def reference_srank(rank: Rank, left: Rank, right: Rank) -> int:
+    ''' Rank of 'rank' between ranked left and right cards: an Ace matches an
+        Ace (L or H) on either end, otherwise it takes whichever of L and H
+        leaves the wider gap to the far end. '''
+    if rank != c.ACE:
+        return rank
+    if left in (c.L, c.H):
+        return left
+    if right in (c.L, c.H):
+        return right
+    return c.H if 13 - left >= right else c.L
+
+def reference_turn(self, deck: list[int]) -> tuple[list[int], Rank, Rank | None, Rank, list[int], int]:
+    ''' The main player's bet, with payouts in a new list indexed by seat. '''
+    left, right, deck = self.deal_leftright(deck)
+    bet: int = self.choose_bet(left=left, right=right)
+    payout, middle, deck = self.get_payout(bet, deck, left=left, right=right)
+    payouts: list[int] = [0]*len(self.players)
+    payouts[self.seat] = payout
+    return payouts, left, middle, right, deck, bet
+
+def reference_deal_leftright(self, deck: list[int]) -> tuple[Rank, Rank, list[int]]:
+    left:  Rank = c.RANK[deck.pop()]
+    right: Rank = c.RANK[deck.pop()]
+    if left == c.ACE:
+        left = self.strategy.left_ace()
+    if right == c.ACE:
+        right = self.strategy.right_ace(left=left)
+    if left > right:
+        right, left = left, right
+    return left, right, deck
+
+def reference_choose_bet(self, left: Rank, right: Rank) -> int:
+    if abs(reference_srank(right, left, right) - reference_srank(left, left, right)) < 2:
+        return 0
+    return min(self.strategy.bet_strategy(left, right), self.pot)
+
+def reference_payout(self, bet: int, deck: list[int], left: Rank, right: Rank) \
+    -> tuple[int, Rank | None, list[int]]:
+    ''' In between wins the bet, outside loses it, and a post loses double; a
+        middle Ace ranks low, so it posts whenever either end is an Ace. '''
+    if bet == 0:
+        return 1, None, deck
+    middle: Rank = c.RANK[deck.pop()]
+    sl: int = reference_srank(left, left, right)
+    sr: int = reference_srank(right, left, right)
+    sm: int = c.L if middle == c.ACE else reference_srank(middle, left, right)
+    if sm == c.L and (sl in (c.L, c.H) or sr in (c.L, c.H)):
+        return -2*bet, middle, deck
+    if sm in (sl, sr):
+        return -2*bet, middle, deck
+    if sl < sm < sr:
+        return bet, middle, deck
+    return -bet, middle, deck
+
+def reference_side_payout(middle: Rank, left: Rank, right: Rank) -> int:
+    ''' A Gamblor side bet of one wins when the middle card misses the gap. '''
+    sl: int = reference_srank(left, left, right)
+    sm: int = reference_srank(middle, left, right)
+    sr: int = reference_srank(right, left, right)
+    if sm in (c.L, c.H) and (sl in (c.L, c.H) or sr in (c.L, c.H)):
+        return -2
+    if sl < sm < sr:
+        return -1
+    if sm in (sl, sr):
+        return -2
+    return 1
+
+class ReferenceCrintonExecution(GameExecution):
+    def execute(self, deck: list[int]) -> tuple[list[int], list[int]]:
+        payouts, left, middle, right, deck, bet = reference_turn(self, deck)
+        if self.recorder is not None:
+            self.recorder.record(self, payouts, left, middle, right, bet, payouts[self.seat])
+        return payouts, deck
+    deal_leftright = reference_deal_leftright
+    choose_bet     = reference_choose_bet
+    get_payout     = reference_payout
+
+class ReferenceSteveExecution(GameExecution):
+    ''' Bets again on the gap 'steve_choose_leftright' keeps, while the
+        player has chips and the pot is not empty. '''
+    def execute(self, deck: list[int]) -> tuple[list[int], list[int]]:
+        payouts, left, middle, right, deck, bet = reference_turn(self, deck)
+        payout: int = 0
+        nl: Rank = tl.NO_CARD
+        nr: Rank = tl.NO_CARD
+        bet2: int = 0
+        xmiddle: Rank | None = tl.NO_CARD
+        if self.player.chips > 0 and self.pot > 0 and middle is not None:
+            nl, nr = self.strategy.steve_choose_leftright(left, middle, right)
+            bet2 = self.choose_bet(left=nl, right=nr)
+            payout, xmiddle, deck = self.get_payout(bet2, deck, left=nl, right=nr)
+        payouts[self.seat] += payout
+        if self.recorder is not None:
+            self.recorder.record(self, payouts, left, middle, right, bet,
+                                 payouts[self.seat] - payout, nl, xmiddle, nr, bet2, payout)
+        return payouts, deck
+    deal_leftright = reference_deal_leftright
+    choose_bet     = reference_choose_bet
+    get_payout     = reference_payout
+
+class ReferenceGamblorExecution(GameExecution):
+    ''' After a main bet, every other seat from the lowest up may side bet one;
+        a winning side bet is only paid while the pot, less what this turn has
+        already paid, covers it. '''
+    def execute(self, deck: list[int]) -> tuple[list[int], list[int]]:
+        payouts, left, middle, right, deck, bet = reference_turn(self, deck)
+        if bet > 0 and self.pot > 0:
+            paid: int = payouts[self.seat]
+            for seat in range(len(self.players)):
+                if seat == self.seat or \
+                   self.players[seat].strategy.default_gamblor_strategy(left, right) != 1:
+                    continue
+                payout: int = reference_side_payout(middle, left, right)
+                if payout < 0 or self.pot - paid >= payout:
+                    payouts[seat] = payout
+                    paid += payout
+        if self.recorder is not None:
+            self.recorder.record(self, payouts, left, middle, right, bet, payouts[self.seat])
+        return payouts, deck
+    deal_leftright = reference_deal_leftright
+    choose_bet     = reference_choose_bet
+    get_payout     = reference_payout
+
+REFERENCE_EXECUTIONS = {m.GameType.CRINTON: ReferenceCrintonExecution,
+                        m.GameType.STEVE:   ReferenceSteveExecution,
+                        m.GameType.GAMBLOR: ReferenceGamblorExecution}
+
+class Setup(NamedTuple):
+    ''' An engine as 'main.play_games' runs it, with a strategy per seat. '''
+    execution: p.GameExecution
+    strategies: list[p.Strategy]
+    engine: m.Engine        = m.Engine.OBJECT
+    deck_model: m.DeckModel = m.DeckModel.CARDS
+
+def reference(gtype: m.GameType, player_count: int = PLAYER_COUNT) -> Setup:
+    ''' The reference execution with the default strategy in every seat. '''
+    return Setup(REFERENCE_EXECUTIONS[gtype], [m.GAMES[gtype][1]()]*player_count)
+
+def candidates(gtype: m.GameType, player_count: int = PLAYER_COUNT) -> dict[str, Setup]:
+    ''' Every engine of the tree playing the default strategy. '''
+    execution, strategy = m.GAMES[gtype]
+    param_strategy: type = op.PARAM_STRATEGIES[gtype]
+    return {'object':  Setup(execution, [strategy()]*player_count),
+            'params':  Setup(execution, [param_strategy(op.DEFAULT_PARAMS)]*player_count),
+            'ranks':   Setup(execution, [strategy()]*player_count, deck_model=m.DeckModel.RANKS),
+            'batch':   Setup(execution, [strategy()]*player_count, engine=m.Engine.BATCH)}
+
+def play(gtype: m.GameType, setup: Setup, player_ante: int, games: int,
+         seeds: np.random.SeedSequence, workers: int = 1) -> an.Analysis:
+    ''' 'games' games of 'setup', split across 'workers' processes. '''
+    shards: list[tuple] = [(gtype, len(setup.strategies), count, player_ante, setup.execution,
+                            setup.strategies, setup.engine, m.BATCH_SIZE,
+                            np.random.default_rng(stream), setup.deck_model)
+                           for count, stream in zip(m.shard_counts(games, workers),
+                                                    seeds.spawn(workers))]
+    with m.worker_pool(workers) as pool:
+        results: list[an.Analysis] = [m.play_games(*shards[0])] if pool is None \
+                                     else pool.starmap(m.play_games, shards)
+    analysis: an.Analysis = results[0]
+    for result in results[1:]:
+        analysis.merge(result)
+    return analysis
+
+class Replay(NamedTuple):
+    ''' 'mismatch' is the index of the first turn whose records differ (or
+        where one log ends), None if every turn matched; 'fields' are the
+        TURN_RECORD fields that differ there, and 'records' both records. '''
+    games: int
+    turns: int
+    mismatch: int | None
+    fields: list[str]
+    records: tuple[tuple, tuple] | None
+
+def record_turns(gtype: m.GameType, setup: Setup, player_ante: int,
+                 streams: list[np.random.SeedSequence], path: str) -> None:
+    ''' Plays a game of 'setup' per stream, shuffling with it, into a turn log. '''
+    with tl.TurnRecorder(path) as recorder:
+        if setup.engine == m.Engine.BATCH:
+            bt.BatchGames(gtype=gtype,
+                          execution=setup.execution,
+                          player_strategies=setup.strategies,
+                          game_count=len(streams),
+                          player_ante=player_ante,
+                          starting_chips=m.STARTING_CHIPS,
+                          rng=np.random.default_rng(streams[0]),
+                          decks=bt.GameDecks(gtype, [np.random.default_rng(stream)
+                                                     for stream in streams]),
+                          recorder=recorder).play()
+            return
+        for stream in streams:
+            m.Game(gtype=gtype,
+                   execution=setup.execution,
+                   players=[Player(chips=m.STARTING_CHIPS, strategy=strategy)
+                            for strategy in setup.strategies],
+                   player_ante=player_ante,
+                   rng=np.random.default_rng(stream),
+                   deck_model=setup.deck_model,
+                   recorder=recorder)
+
+def replay(gtype: m.GameType, reference: Setup, candidate: Setup,
+           player_ante: int = PLAYER_ANTE, games: int = REPLAY_GAMES,
+           seed: int | None = None) -> Replay:
+    ''' Plays 'games' games of each on the same seeded decks and compares their
+        turn logs record by record, each in game order. '''
+    if reference.deck_model != candidate.deck_model:
+        raise ValueError(f'Deck models {reference.deck_model} and {candidate.deck_model} '
+                         'deal different decks from one seed')
+    streams: list[np.random.SeedSequence] = np.random.SeedSequence(seed).spawn(games)
+    with tempfile.TemporaryDirectory() as directory:
+        paths: list[str] = [os.path.join(directory, f'{side}.turns') for side in ('a', 'b')]
+        for setup, path in zip((reference, candidate), paths):
+            record_turns(gtype, setup, player_ante, streams, path)
+        # A BATCH log holds a step of every game at a time: a stable sort by
+        # game puts it in the order an OBJECT log plays them.
+        a, b = (log[np.argsort(log['game'], kind='stable')]
+                for log in (tl.open_log(path) for path in paths))
+        turns: int = min(len(a), len(b))
+        for start in range(0, turns, tl.CHUNK_TURNS):
+            stop: int = min(start + tl.CHUNK_TURNS, turns)
+            differs: np.ndarray = np.flatnonzero(a[start:stop] != b[start:stop])
+            if len(differs):
+                i: int = start + int(differs[0])
+                return Replay(games, turns, i, [field for field in tl.TURN_RECORD.names
+                                                if a[i][field] != b[i][field]],
+                              (a[i].tolist(), b[i].tolist()))
+        if len(a) != len(b):
+            return Replay(games, turns, turns, ['length'], None)
+    return Replay(games, turns, None, [], None)
+
+class SeatTest(NamedTuple):
+    ''' Two-sample tests of one seat's chips won per game. '''
+    seat: int
+    reference_mean: float
+    candidate_mean: float
+    z: float
+    mean_p: float
+    ks: float
+    ks_p: float
+
+def kolmogorov_p(d: float, n_a: int, n_b: int) -> float:
+    ''' Asymptotic p-value of a two-sample Kolmogorov-Smirnov statistic. '''
+    en: float = sqrt(n_a*n_b/(n_a + n_b))
+    x: float  = (en + 0.12 + 0.11/en)*d
+    if x < 0.3:
+        return 1.0
+    return min(max(2*sum((-1)**(k-1)*exp(-2*k*k*x*x) for k in range(1, 101)), 0.0), 1.0)
+
+def seat_tests(reference: an.Analysis, candidate: an.Analysis) -> list[SeatTest]:
+    tests: list[SeatTest] = []
+    for seat in range(reference.player_count):
+        se: float = sqrt(reference.stdev(seat)**2/reference.count +
+                         candidate.stdev(seat)**2/candidate.count)
+        z: float  = (candidate.mean[seat] - reference.mean[seat])/se if se else 0.0
+        cdfs: list[np.ndarray] = [np.cumsum(analysis.histogram[seat])/analysis.count
+                                  for analysis in (reference, candidate)]
+        ks: float = float(np.abs(cdfs[0] - cdfs[1]).max())
+        tests.append(SeatTest(seat=seat,
+                              reference_mean=reference.mean[seat],
+                              candidate_mean=candidate.mean[seat],
+                              z=z,
+                              mean_p=2*(1 - NormalDist().cdf(abs(z))),
+                              ks=ks,
+                              ks_p=kolmogorov_p(ks, reference.count, candidate.count)))
+    return tests
+
+def compare_distributions(gtype: m.GameType, reference: Setup, candidate: Setup,
+                          player_ante: int = PLAYER_ANTE, games: int = SAMPLE_GAMES,
+                          seed: int | None = None, workers: int = 1) -> list[SeatTest]:
+    ''' Plays 'games' games of each on independent decks and tests every seat. '''
+    streams: list[np.random.SeedSequence] = np.random.SeedSequence(seed).spawn(2)
+    return seat_tests(play(gtype, reference, player_ante, games, streams[0], workers),
+                      play(gtype, candidate, player_ante, games, streams[1], workers))
+
+class ArchivedRun(NamedTuple):
+    gtype: m.GameType
+    games: int
+    ante: int
+    turns: list[int]
+    chips_won: list[int]
+    stdev: list[float]
+
+def archived_runs(text: str = st.OLD_SCHOOL) -> dict[m.GameType, ArchivedRun]:
+    ''' The runs in an 'Analysis.display_results' listing such as 'steve.OLD_SCHOOL'. '''
+    runs: dict[m.GameType, ArchivedRun] = {}
+    for block in re.split(r'\n(?=\w+\tNumber of games)', text)[1:]:
+        header, *players = block.strip().splitlines()
+        gtype, games, ante = re.match(r'(\w+)\tNumber of games: (\d+)\tAnte: (\d+)', header).groups()
+        seats: list[tuple[str, ...]] = [re.search(r'Turns:\s*(-?\d+)\s*Chips Won:\s*(-?\d+)'
+                                                  r'.*Chips Won/g:\s*\S+\s+(\S+)', line).groups()
+                                        for line in players]
+        runs[m.GameType(gtype)] = ArchivedRun(gtype=m.GameType(gtype),
+                                              games=int(games),
+                                              ante=int(ante),
+                                              turns=[int(seat[0]) for seat in seats],
+                                              chips_won=[int(seat[1]) for seat in seats],
+                                              stdev=[float(seat[2]) for seat in seats])
+    return runs
+
+class ArchiveCheck(NamedTuple):
+    ''' One seat's chips won and turns per game against the archived run.
+        Standard errors are batch means; the archive's own error is included
+        for chips, and its turns (whose spread it did not keep) are taken as
+        exact, which at 100M games costs little. '''
+    seat: int
+    archived_chips: float
+    chips: float
+    chips_p: float
+    archived_turns: float
+    turns: float
+    turns_p: float
+
+def check_archive(gtype: m.GameType, setup: Setup | None = None, games: int = ARCHIVE_GAMES,
+                  batches: int = ARCHIVE_BATCHES, seed: int | None = None,
+                  workers: int = 1) -> list[ArchiveCheck]:
+    ''' Plays 'games' games of 'setup' (the default object engine) in
+        'batches' batches, on the archived run's table and ante. '''
+    archived: ArchivedRun = archived_runs()[gtype]
+    player_count: int = len(archived.turns)
+    setup = candidates(gtype, player_count)['object'] if setup is None else setup
+    shards: list[tuple] = [(gtype, player_count, count, archived.ante, setup.execution,
+                            setup.strategies, setup.engine, m.BATCH_SIZE,
+                            np.random.default_rng(stream), setup.deck_model)
+                           for count, stream in zip(m.shard_counts(games, batches),
+                                                    np.random.SeedSequence(seed).spawn(batches))]
+    with m.worker_pool(workers) as pool:
+        results: list[an.Analysis] = [m.play_games(*shard) for shard in shards] if pool is None \
+                                     else pool.starmap(m.play_games, shards)
+    means: an.BatchMeans = an.BatchMeans(2*player_count)
+    for result in results:
+        means.add([result.chips_per_game(s) for s in range(player_count)] +
+                  [result.turns[s]/result.count for s in range(player_count)])
+    stderr: list[float] = means.stderr()
+    def p_value(value: float, expected: float, se: float) -> float:
+        return 2*(1 - NormalDist().cdf(abs(value - expected)/se)) if se else float(value == expected)
+    checks: list[ArchiveCheck] = []
+    for s in range(player_count):
+        chips: float = archived.chips_won[s]/archived.games
+        turns: float = archived.turns[s]/archived.games
+        se: float    = sqrt(stderr[s]**2 + archived.stdev[s]**2/archived.games)
+        checks.append(ArchiveCheck(seat=s,
+                                   archived_chips=chips,
+                                   chips=means.mean[s],
+                                   chips_p=p_value(means.mean[s], chips, se),
+                                   archived_turns=turns,
+                                   turns=means.mean[player_count+s],
+                                   turns_p=p_value(means.mean[player_count+s], turns,
+                                                   stderr[player_count+s])))
+    return checks
+
+def passes(p_values: list[float], alpha: float = ALPHA) -> bool:
+    return min(p_values) >= alpha/len(p_values)
+
+def validate(gtypes: list[m.GameType] = list(m.GameType),
+             replay_games: int = REPLAY_GAMES,
+             sample_games: int = SAMPLE_GAMES,
+             archive_games: int = ARCHIVE_GAMES,
+             alpha: float = ALPHA,
+             seed: int | None = None,
+             workers: int = 1) -> bool:
+    ''' Runs every check of every candidate engine of 'gtypes' against the
+        reference, displaying each; True when all of them pass. A zero game
+        count skips that kind of check. '''
+    passed: bool = True
+    for gtype in gtypes:
+        base: Setup = reference(gtype)
+        for name, candidate in candidates(gtype).items():
+            if replay_games:
+                result: Replay = replay(gtype, reference(gtype)._replace(deck_model=candidate.deck_model),
+                                        candidate, games=replay_games, seed=seed)
+                passed &= result.mismatch is None
+                print(f'{gtype:<8} {name:<7} replay of {result.games} games: ' +
+                      (f'{result.turns} turns identical' if result.mismatch is None else
+                       f'turn {result.mismatch} differs in {result.fields}: {result.records}'))
+            if sample_games and name != 'object':
+                tests: list[SeatTest] = compare_distributions(gtype, base, candidate,
+                                                              games=sample_games, seed=seed,
+                                                              workers=workers)
+                p_values: list[float] = [t.mean_p for t in tests] + [t.ks_p for t in tests]
+                passed &= passes(p_values, alpha)
+                print(f'{gtype:<8} {name:<7} distributions over {sample_games} games: '
+                      f'min p {min(p_values):.4f} ' + ('PASS' if passes(p_values, alpha) else 'FAIL'))
+                for t in tests:
+                    print(f'    Seat {t.seat}  Chips Won/g: {t.reference_mean:8.3f} {t.candidate_mean:8.3f}'
+                          f'  z: {t.z:6.2f} p: {t.mean_p:.4f}  KS: {t.ks:.4f} p: {t.ks_p:.4f}')
+        if archive_games:
+            checks: list[ArchiveCheck] = check_archive(gtype, games=archive_games, seed=seed,
+                                                       workers=workers)
+            p_values: list[float] = [k.chips_p for k in checks] + [k.turns_p for k in checks]
+            verdict: str = 'PASS' if passes(p_values, alpha) else 'FAIL'
+            if gtype in ARCHIVE_RULES:
+                passed &= passes(p_values, alpha)
+            else:
+                verdict += ' (archived under older rules, not counted)'
+            print(f'{gtype:<8} object  against OLD SCHOOL over {archive_games} games: '
+                  f'min p {min(p_values):.4f} {verdict}')
+            for k in checks:
+                print(f'    Seat {k.seat}  Chips Won/g: {k.archived_chips:8.3f} {k.chips:8.3f} '
+                      f'p: {k.chips_p:.4f}  Turns/g: {k.archived_turns:8.3f} {k.turns:8.3f} '
+                      f'p: {k.turns_p:.4f}')
+    return passed
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Validate every engine against the reference '
+                                                 'rules and the archived results.')
+    parser.add_argument('--gtype', nargs='+', default=list(m.GameType), choices=list(m.GameType))
+    parser.add_argument('--replay-games', type=int, default=REPLAY_GAMES)
+    parser.add_argument('--sample-games', type=int, default=SAMPLE_GAMES)
+    parser.add_argument('--archive-games', type=int, default=ARCHIVE_GAMES)
+    parser.add_argument('--alpha', type=float, default=ALPHA)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args(argv)
+    return 0 if validate([m.GameType(gtype) for gtype in args.gtype], args.replay_games,
+                         args.sample_games, args.archive_games, args.alpha, args.seed,
+                         args.workers) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
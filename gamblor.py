@@ -1,4 +1,6 @@
 from protocols import Strategy, GameExecution
+from player import Player
+import cards as c
 import strategies as s
 import executions as ex
 
@@ -14,59 +16,71 @@ class GamblorStrategy(Strategy):
     right_ace    = s.default_right_ace
     bet_strategy = s.default_bet_strategy
     def default_gamblor_strategy(self, left: s.Rank, right: s.Rank) -> int:
-        gap: int = 13 - s.srank(right,(left,right)) + s.srank(left,(left,right))
+        gap: int = 13 - right + left
         return 1 if gap >= 7 else 0
 
 class GamblorExecution(GameExecution):
     ''' Gamblor turn execution.
             Handles main player like Crinton.
             Gives all other players a chance to bet one in missing the gap.
-                'gamblor_choose_bet' applies chosen other player betting strategy
+                'side_bettors' are the other seats whose strategy bets on the
+                    gap, found a group of seats per distinct compiled table
+                    (by 'fingerprint') at a time.
                 'get_gamblor_payout' applies standard payouts to other players
-                    assuming bet size one.
+                    assuming bet size one; every side bet of a turn pays the same.
             If pot empties during payout of other players, players are paid
                 from left to right.
     '''
-    def execute(self, deck: list[str]) -> int:
-        payouts: dict[int,int]
+    def __init__(self, current_player: Player, players: list[Player], pot: int) -> None:
+        super().__init__(current_player, players, pot)
+        fingerprints: set[str] = {player.table.fingerprint for player in players}
+        if len(fingerprints) == 1:
+            others: list[int] = list(range(len(players)))
+            del others[self.seat]
+            self.side_groups: list[tuple[list[list[int]], list[int]]] = \
+                [(self.table.side_bet_table, others)]
+            return
+        groups: dict[str, tuple[list[list[int]], list[int]]] = {}
+        for op, player in enumerate(players):
+            if op != self.seat:
+                groups.setdefault(player.table.fingerprint,
+                                  (player.table.side_bet_table, []))[1].append(op)
+        self.side_groups = list(groups.values())
+
+    def execute(self, deck: list[int]) -> tuple[list[int], list[int]]:
+        payouts: list[int]
         left: s.Rank
         middle: s.Rank
         right: s.Rank
         bet: int
         payouts, left, middle, right, deck, bet = ex.crinton_execute(self, deck)
         if (bet > 0) and (self.pot > 0):
-            obet: dict[int,int] = dict()
-            other_players: list[int] = [p for p in range(len(self.players)) \
-                                        if self.players[p]!=self.player]
-            opayout: int = sum(payouts.values())
-            for op in other_players:
-                obet[op]      = self.gamblor_choose_bet(op, left=left, right=right)
-                payout2: int  = self.get_gamblor_payout(obet, op, left, right, middle)
-                if payout2 and (((payout2 > 0) and (self.pot - opayout >= payout2)) or payout2 < 0):
+            bettors: list[int] = self.side_bettors(left, right)
+            if bettors:
+                payout2: int = self.get_gamblor_payout(1, left, right, middle)
+                if payout2 > 0:
+                    bettors = bettors[:max(self.pot - payouts[self.seat], 0)//payout2]
+                for op in bettors:
                     payouts[op] = payout2
-                    opayout += payout2
+        if self.recorder is not None:
+            self.recorder.record(self, payouts, left, middle, right, bet, payouts[self.seat])
         return payouts, deck
 
     deal_leftright = ex.default_deal_leftright
     choose_bet     = ex.default_choose_bet
     get_payout     = ex.get_standard_payout
 
-    def gamblor_choose_bet(self, op: int, left: s.Rank, right: s.Rank) -> int:
-        return self.players[op].strategy.default_gamblor_strategy(left,right)
-    def get_gamblor_payout(self, obet: int, op: int, \
+    def side_bettors(self, left: s.Rank, right: s.Rank) -> list[int]:
+        ''' Other seats that side bet on the gap, lowest first. With one strategy
+            in every other seat this is that group's own list, so it must not be
+            modified. '''
+        if len(self.side_groups) == 1:
+            table, seats = self.side_groups[0]
+            return seats if table[left][right] == 1 else []
+        return sorted(op for table, seats in self.side_groups if table[left][right] == 1
+                      for op in seats)
+    def get_gamblor_payout(self, obet: int, \
                            left: s.Rank, right: s.Rank, middle: s.Rank) -> int:
-        if obet[op]==1:
-            payout: int
-            sl: int = s.srank(left,  (left,right))
-            sm: int = s.srank(middle,(left,right))
-            sr: int = s.srank(right, (left,right))
-            if sm in [0,13] and ((sl in [0,13]) or (sr in [0,13])): 
-                payout = -2
-            elif sl < sm < sr: 
-                payout = -1
-            elif (sm==sl) or (sm==sr): 
-                payout = -2
-            else: 
-                payout = 1
-            return payout
-        return None
\ No newline at end of file
+        if obet==1:
+            return c.GAMBLOR_PAYOUT[middle][left][right]
+        return None
@@ -0,0 +1,145 @@
+''' Instrumentation of the object engine: phase timers, event counters and
+    sampled turn traces.
+        'instrumented' subclasses a Game class and an execution class with
+            methods that time and count around the originals. 'main.play_games'
+            only plays the subclasses when given an EngineStats, so an
+            uninstrumented run executes none of this code.
+        Phases nest: 'play_game' holds 'deal_deck' and 'execute', and 'execute'
+            (the turn, 'executions.crinton_execute' plus any second or side
+            bets) holds 'deal_leftright', 'choose_bet' and 'get_payout'.
+        Every 'trace_every'th turn is kept as a TracedTurn, up to 'trace_limit'. '''
+from time import perf_counter_ns
+from typing import NamedTuple
+import cards as c
+
+PHASES: tuple[str, ...]   = ('play_game', 'deal_deck', 'execute',
+                             'deal_leftright', 'choose_bet', 'get_payout')
+COUNTERS: tuple[str, ...] = ('games', 'turns', 'reshuffles', 'bets', 'zero_bets', 'posts',
+                             'capped_bets', 'side_bets_skipped')
+TRACE_LIMIT: int = 10000
+
+class TracedTurn(NamedTuple):
+    ''' A sampled turn. 'bets' holds (left, middle, right, bet, payout) for each
+        of the player's bets, 'middle' None where no card was drawn; 'payouts'
+        is every seat's payout. '''
+    game: int
+    turn: int
+    seat: int
+    pot: int
+    bets: tuple[tuple[int, int | None, int, int, int], ...]
+    payouts: tuple[int, ...]
+
+class EngineStats:
+    ''' Totals of an instrumented run.
+            'ns' and 'calls': nanoseconds spent in, and calls of, each phase.
+            'counts': 'reshuffles' are deals after a game's first; 'bets' are
+                bets resolved (a Steve turn may make two) and 'zero_bets' those
+                of nothing; 'capped_bets' were cut to the pot; 'side_bets_skipped'
+                are winning Gamblor side bets not paid because the pot ran dry. '''
+    def __init__(self, trace_every: int = 0, trace_limit: int = TRACE_LIMIT) -> None:
+        self.trace_every: int        = trace_every
+        self.trace_limit: int        = trace_limit
+        self.ns: dict[str, int]      = dict.fromkeys(PHASES, 0)
+        self.calls: dict[str, int]   = dict.fromkeys(PHASES, 0)
+        self.counts: dict[str, int]  = dict.fromkeys(COUNTERS, 0)
+        self.trace: list[TracedTurn] = []
+
+    def spawn(self) -> 'EngineStats':
+        ''' Empty stats with the same tracing, for a worker's shard. '''
+        return EngineStats(self.trace_every, self.trace_limit)
+
+    def merge(self, other: 'EngineStats') -> None:
+        for phase in PHASES:
+            self.ns[phase]    += other.ns[phase]
+            self.calls[phase] += other.calls[phase]
+        for counter in COUNTERS:
+            self.counts[counter] += other.counts[counter]
+        self.trace.extend(other.trace[:self.trace_limit - len(self.trace)])
+
+    def display(self) -> None:
+        total: int = self.ns['play_game'] or 1
+        for phase in PHASES:
+            calls: int = self.calls[phase]
+            print(f'{phase:<15} Calls: {calls:>12} Seconds: {self.ns[phase]/1e9:10.3f}'
+                  f' ns/call: {self.ns[phase]/calls if calls else 0:8.0f}'
+                  f' of play_game: {self.ns[phase]/total:7.1%}')
+        print('  '.join(f'{counter}: {count}' for counter, count in self.counts.items()))
+        if self.trace:
+            print(f'Traced turns: {len(self.trace)}, every {self.trace_every}')
+
+def instrumented(game_class: type, execution: type, stats: EngineStats) -> tuple[type, type]:
+    ''' Subclasses of 'game_class' and 'execution' that record into 'stats'. '''
+    ns: dict[str, int]     = stats.ns
+    calls: dict[str, int]  = stats.calls
+    counts: dict[str, int] = stats.counts
+    side_bets: bool        = hasattr(execution, 'side_bettors')
+
+    class InstrumentedExecution(execution):
+        def execute(self, deck: list[int]) -> tuple[list[int], list[int]]:
+            self.turn_bets: list[tuple[int, int | None, int, int, int]] = []
+            start: int = perf_counter_ns()
+            payouts, deck = super().execute(deck)
+            ns['execute']    += perf_counter_ns() - start
+            calls['execute'] += 1
+            counts['turns']  += 1
+            if side_bets and self.turn_bets and self.turn_bets[0][3] > 0:
+                left, middle, right, _, _ = self.turn_bets[0]
+                if self.get_gamblor_payout(1, left, right, middle) > 0:
+                    counts['side_bets_skipped'] += sum(payouts[op] == 0
+                                                       for op in self.side_bettors(left, right))
+            if stats.trace_every and counts['turns'] % stats.trace_every == 0 \
+               and len(stats.trace) < stats.trace_limit:
+                stats.trace.append(TracedTurn(game=counts['games'], turn=counts['turns'],
+                                              seat=self.seat, pot=self.pot,
+                                              bets=tuple(self.turn_bets), payouts=tuple(payouts)))
+            return payouts, deck
+
+        def deal_leftright(self, deck):
+            start: int = perf_counter_ns()
+            dealt = super().deal_leftright(deck)
+            ns['deal_leftright']    += perf_counter_ns() - start
+            calls['deal_leftright'] += 1
+            return dealt
+
+        def choose_bet(self, left: int, right: int) -> int:
+            start: int = perf_counter_ns()
+            bet: int = super().choose_bet(left=left, right=right)
+            ns['choose_bet']    += perf_counter_ns() - start
+            calls['choose_bet'] += 1
+            if bet and bet == self.pot and self.table.bet_table[left][right] > bet:
+                counts['capped_bets'] += 1
+            return bet
+
+        def get_payout(self, bet: int, deck: list[int], left: int, right: int):
+            start: int = perf_counter_ns()
+            payout, middle, deck = super().get_payout(bet, deck, left=left, right=right)
+            ns['get_payout']    += perf_counter_ns() - start
+            calls['get_payout'] += 1
+            counts['bets'] += 1
+            if bet == 0:
+                counts['zero_bets'] += 1
+            elif payout == c.POST*bet:
+                counts['posts'] += 1
+            self.turn_bets.append((left, middle, right, bet, payout))
+            return payout, middle, deck
+
+    class InstrumentedGame(game_class):
+        def deal_deck(self):
+            if self.arg is not None:
+                counts['reshuffles'] += 1
+            start: int = perf_counter_ns()
+            deck = super().deal_deck()
+            ns['deal_deck']    += perf_counter_ns() - start
+            calls['deal_deck'] += 1
+            return deck
+
+        def play_game(self) -> None:
+            start: int = perf_counter_ns()
+            super().play_game()
+            ns['play_game']    += perf_counter_ns() - start
+            calls['play_game'] += 1
+            counts['games']    += 1
+
+    InstrumentedExecution.__name__ = f'Instrumented{execution.__name__}'
+    InstrumentedGame.__name__      = f'Instrumented{game_class.__name__}'
+    return InstrumentedGame, InstrumentedExecution
@@ -1,8 +1,16 @@
 import crinton as cr
+import cards as c
 import steve as st
 import gamblor as ga
 import analysis as an
+import batch as bt
+import rankdeck as rd
+import turnlog as tl
+import checkpoint as ck
+import instrument as ins
 import numpy as np
+import multiprocessing as mp
+import contextlib
 import protocols as p
 from player import Player
 from enum import StrEnum, auto
@@ -12,89 +20,376 @@ class GameType(StrEnum):
     STEVE   = auto()
     GAMBLOR = auto()
 
+# The execution and default strategy of each game.
+GAMES = {GameType.CRINTON: (cr.CrintonExecution, cr.CrintonStrategy),
+         GameType.STEVE:   (st.SteveExecution,   st.SteveStrategy),
+         GameType.GAMBLOR: (ga.GamblorExecution, ga.GamblorStrategy)}
+
+class Engine(StrEnum):
+    OBJECT = auto()
+    BATCH  = auto()
+
+class DeckModel(StrEnum):
+    CARDS = auto()
+    RANKS = auto()
+
+class Metric(StrEnum):
+    ROI       = auto()
+    CHIPS_WON = auto()
+
 ARG_COUNT = {'crinton': 3, 'steve': 5, 'gamblor': 7}
 MIN_COUNT = {'crinton': 3, 'steve': 4, 'gamblor': 3}
+STARTING_CHIPS: int = 160
+# Bumped whenever a change to the rules or engines changes the results of a
+# seed, so cached results ('sweep.py') from older engines are not reused.
+ENGINE_VERSION: int = 1
+BATCH_SIZE: int     = 100000
+BATCH_GAMES: int    = 1000
+MIN_BATCHES: int    = 30
+CONFIDENCE: float   = 0.95
+
+def shuffle_deck(gtype: GameType, rng: np.random.Generator, arg: np.ndarray | None) \
+    -> tuple[np.ndarray, np.ndarray]:
+    ''' A shuffled deck of int cards and the reserved cards. With no 'arg' the
+        last ARG_COUNT cards are reserved; otherwise the deck leaves 'arg' out. '''
+    deck: np.ndarray = c.DECK.copy()
+    rng.shuffle(deck)
+    if arg is None:
+        return deck[:len(deck)-ARG_COUNT[gtype]], deck[len(deck)-ARG_COUNT[gtype]:]
+    return deck[~np.isin(deck, arg)], arg
 
 class Game:
     def __init__(self, 
                  gtype: GameType, 
                  execution: p.GameExecution, 
                  players: list[Player], 
-                 player_ante: int) \
+                 player_ante: int,
+                 rng: np.random.Generator | None = None,
+                 deck_model: DeckModel = DeckModel.CARDS,
+                 recorder: tl.TurnRecorder | None = None) \
                  -> None:
         self.gtype : GameType           = gtype
+        self.rng: np.random.Generator   = np.random if rng is None else rng
+        self.deck_model: DeckModel      = deck_model
         self.execution: p.GameExecution = execution
         self.players: list[Player]      = players
         self.player_count: int          = len(self.players)
         self.player_ante: int           = player_ante
         self.starting_chips: list[int]  = [player.chips for player in self.players]
         self.pot: int                   = 0
-        self.arg: int | None            = None
-        self.deck: list[str] | None     = None
+        self.arg: np.ndarray | list[int] | None = None
+        self.deck: list[int] | rd.RankDeck | None = None
+        self.recorder: tl.TurnRecorder | None = recorder
+        self.executions: list[p.GameExecution] = \
+            [execution(player, self.players, self.pot) for player in self.players]
+        for turn in self.executions:
+            turn.recorder = recorder
         self.play_game()
 
     def ante(self) -> None:
         self.pot = self.player_ante * self.player_count
         for player in self.players:
             player.chips -= self.player_ante
-            player.payouts.append(-self.player_ante)
 
     def process_payout(self, cp: int, payout: int) -> None:
         self.players[cp].chips += payout
         self.pot -= payout
 
-    def deal_deck(self) -> list[str]:
-        self.deck: list[str] = [r+s for r in '23456789TJQKA' for s in 'SCHD']
-        np.random.shuffle(self.deck)
-        if not self.arg:
-            self.arg: tuple[str, ...] = tuple([self.deck.pop() \
-                                               for _ in range(ARG_COUNT[self.gtype])])
+    def deal_deck(self) -> list[int] | rd.RankDeck:
+        ''' Shuffles a fresh deck of int cards (see 'cards.py'). The first deal
+            reserves ARG_COUNT cards from the end; later deals leave them out.
+            With DeckModel.RANKS the deck is a RankDeck: the reserved cards are
+            its first draws, and reshuffling restores its counts. '''
+        if self.deck_model == DeckModel.RANKS:
+            if self.arg is None:
+                self.deck: rd.RankDeck = rd.RankDeck(self.rng)
+                self.arg: list[int] = [self.deck.pop() for _ in range(ARG_COUNT[self.gtype])]
+            else:
+                self.deck.reshuffle(self.arg)
             return self.deck
-        self.deck: list[str] = [e for e in self.deck if e not in self.arg]
+        deck: np.ndarray
+        deck, self.arg = shuffle_deck(self.gtype, self.rng, self.arg)
+        self.deck: list[int] = deck.tolist()
+        return self.deck
 
     def play_game(self) -> None:
+        if self.recorder is not None:
+            self.recorder.new_game()
         self.ante()
         self.deal_deck()
         current_player: int = 0
 
         while self.pot > 0:
             if self.players[current_player].chips > 0: 
-                self.turn: p.GameExecution = \
-                    self.execution(self.players[current_player], self.players, self.pot)
+                self.turn: p.GameExecution = self.executions[current_player]
+                self.turn.pot = self.pot
                 self.players[current_player].turns += 1 
                 if len(self.deck) < MIN_COUNT[self.gtype]: 
                     self.deal_deck() 
-                payouts: dict[int,int]
+                payouts: list[int]
                 payouts, self.deck = self.turn.execute(self.deck)
-                for p in range(len(self.players)):
+                for p in range(self.player_count):
                     if payouts[p] != 0:
                         self.process_payout(p, payouts[p])
-                        self.players[p].payouts.append(payouts[p])
+            elif all(player.chips <= 0 for player in self.players):
+                # Nobody can play for the pot: the game ends with it unclaimed.
+                break
             current_player = (current_player+1) % self.player_count
 
+    def chips_won(self) -> list[int]:
+        return [player.chips - chips for player, chips in zip(self.players, self.starting_chips)]
+
+def play_games(gtype: GameType, 
+               player_count: int, 
+               game_count: int, 
+               player_ante: int, 
+               execution: p.GameExecution,
+               player_strategies: list[p.Strategy],
+               engine: Engine = Engine.OBJECT,
+               batch_size: int = BATCH_SIZE,
+               rng: np.random.Generator | None = None,
+               deck_model: DeckModel = DeckModel.CARDS,
+               record_path: str | None = None,
+               first_game: int = 0,
+               analysis: an.Analysis | None = None,
+               starting_chips: int = STARTING_CHIPS,
+               stats: ins.EngineStats | None = None) -> an.Analysis:
+    ''' Plays 'game_count' games and returns their Analysis.
+            'engine' OBJECT plays one Game at a time; BATCH plays up to
+                'batch_size' games at once with the NumPy engine in 'batch.py'.
+            'rng' shuffles every deck; None uses the global NumPy random state
+                (OBJECT) or a freshly seeded Generator (BATCH).
+            'deck_model' is the OBJECT engine's deck: shuffled CARDS, or RANKS
+                counts ('rankdeck.py'). BATCH keeps its own decks of cards.
+            'record_path' writes every OBJECT turn to a new turn log ('turnlog.py'),
+                numbering games from 'first_game'.
+            'analysis' continues an earlier Analysis of the same players instead
+                of starting a new one.
+            'starting_chips' are every player's chips before the first ante.
+            'stats' instruments the OBJECT engine ('instrument.py'): phase
+                timings and counts are added to it, and it is the Analysis's
+                'stats'. Without it the engine runs uninstrumented. '''
+    if engine == Engine.BATCH and deck_model != DeckModel.CARDS:
+        raise ValueError(f'Engine {engine} only supports deck model {DeckModel.CARDS}')
+    if engine == Engine.BATCH and record_path is not None:
+        raise ValueError(f'Engine {engine} does not record turn logs')
+    if engine == Engine.BATCH and stats is not None:
+        raise ValueError(f'Engine {engine} is not instrumented')
+    if analysis is None:
+        analysis: an.Analysis = an.Analysis(gtype=gtype, 
+                                            player_strategies=player_strategies, 
+                                            game_count=game_count, 
+                                            ante=player_ante)
+    else:
+        analysis.game_count += game_count
+    if stats is not None:
+        analysis.stats = stats
+    if engine == Engine.BATCH:
+        rng: np.random.Generator = np.random.default_rng() if rng is None else rng
+        for start in range(0, game_count, batch_size):
+            turns, chips_won = bt.play_batch(gtype=gtype,
+                                             execution=execution,
+                                             player_strategies=player_strategies,
+                                             game_count=min(batch_size, game_count-start),
+                                             player_ante=player_ante,
+                                             starting_chips=starting_chips,
+                                             rng=rng)
+            analysis.record_games(turns, chips_won)
+    else:
+        recorder: tl.TurnRecorder | None = None if record_path is None \
+                                           else tl.TurnRecorder(record_path, first_game)
+        game_class: type = Game
+        if stats is not None:
+            game_class, execution = ins.instrumented(Game, execution, stats)
+        for _ in range(game_count):
+            players: list[Player] = [Player(chips=starting_chips, 
+                                     strategy=player_strategies[j]) 
+                                     for j in range(player_count)]
+            game = game_class(gtype=gtype, 
+                              execution=execution, 
+                              players=players, 
+                              player_ante=player_ante,
+                              rng=rng,
+                              deck_model=deck_model,
+                              recorder=recorder)
+            analysis.record_game([player.turns for player in game.players], game.chips_won())
+        if recorder is not None:
+            recorder.close()
+    return analysis
+
+def shard_counts(game_count: int, workers: int) -> list[int]:
+    ''' Splits 'game_count' games as evenly as possible across 'workers'. '''
+    return [game_count//workers + (1 if w < game_count % workers else 0) 
+            for w in range(workers)]
+
+def worker_pool(workers: int) -> contextlib.AbstractContextManager:
+    ''' A Pool of 'workers' processes, or for one worker a context of None,
+        meaning play in this process. '''
+    return mp.Pool(workers) if workers > 1 else contextlib.nullcontext()
+
 def run_analysis(gtype: GameType, 
                  player_count: int, 
                  game_count: int, 
                  player_ante: int, 
                  execution: p.GameExecution,
-                 player_strategies: list[p.Strategy]):
-    analysis: an.Analysis = an.Analysis(gtype=gtype, 
-                                        player_strategies=player_strategies, 
-                                        game_count=game_count, 
-                                        ante=player_ante)
-    for _ in range(game_count):
-        players: list[Player] = [Player(chips=160, 
-                                 strategy=player_strategies[j]) 
-                                 for j in range(player_count)]
-        game = Game(gtype=gtype, 
-                    execution=execution, 
-                    players=players, 
-                    player_ante=player_ante)
-        for j in range(player_count):
-            analysis.turns[j]     += game.players[j].turns
-            analysis.chips_won[j] += game.players[j].chips-game.starting_chips[j]
-            analysis.payouts[j].extend([sum(game.players[j].payouts)])
+                 player_strategies: list[p.Strategy],
+                 engine: Engine = Engine.OBJECT,
+                 batch_size: int = BATCH_SIZE,
+                 seed: int | None = None,
+                 workers: int = 1,
+                 deck_model: DeckModel = DeckModel.CARDS,
+                 record_path: str | None = None,
+                 checkpoint_path: str | None = None,
+                 checkpoint_games: int | None = None,
+                 starting_chips: int = STARTING_CHIPS,
+                 stats: ins.EngineStats | None = None) -> an.Analysis:
+    ''' Plays 'game_count' games, displays the results and returns the Analysis.
+            Without 'seed' and with one worker, games are played serially as
+                'play_games' does by default.
+            Otherwise 'game_count' is split across 'workers' processes, each
+                shuffling with its own stream spawned from 'seed', and the
+                per-worker Analyses are merged in worker order. The same seed
+                and worker count give identical results.
+            'record_path' names the turn log; with several workers each writes
+                its own, 'record_path' suffixed with its worker number, and game
+                ids stay unique across them.
+            'checkpoint_path' checkpoints each worker's shard every
+                'checkpoint_games' games, 'checkpoint.CHECKPOINT_GAMES' by
+                default ('checkpoint.py'), suffixed with its
+                worker number when there are several; 'checkpoint.resume_analysis'
+                finishes an interrupted run with the result this one would give.
+            'stats' instruments the run (see 'play_games') and is displayed
+                after the results; each worker fills its own copy, and they are
+                merged into it. '''
+    if checkpoint_path is not None and record_path is not None:
+        raise ValueError('Checkpointed runs cannot record turn logs')
+    if checkpoint_path is not None and stats is not None:
+        raise ValueError('Checkpointed runs cannot be instrumented')
+    if checkpoint_games is None:
+        checkpoint_games = ck.CHECKPOINT_GAMES
+    if seed is None and workers == 1 and checkpoint_path is None:
+        analysis: an.Analysis = play_games(gtype=gtype,
+                                           player_count=player_count,
+                                           game_count=game_count,
+                                           player_ante=player_ante,
+                                           execution=execution,
+                                           player_strategies=player_strategies,
+                                           engine=engine,
+                                           batch_size=batch_size,
+                                           deck_model=deck_model,
+                                           record_path=record_path,
+                                           starting_chips=starting_chips,
+                                           stats=stats)
+    else:
+        streams: list[np.random.SeedSequence] = np.random.SeedSequence(seed).spawn(workers)
+        counts: list[int] = shard_counts(game_count, workers)
+        rngs: list[np.random.Generator] = [np.random.default_rng(stream) for stream in streams]
+        if checkpoint_path is None:
+            paths: list[str | None] = [record_path if record_path is None or workers == 1 \
+                                       else f'{record_path}.{w}' for w in range(workers)]
+            shards: list[tuple] = [(gtype, player_count, count, player_ante, execution, 
+                                    player_strategies, engine, batch_size, 
+                                    rng, deck_model, path, sum(counts[:w]), None, starting_chips,
+                                    None if stats is None else stats if workers == 1 else stats.spawn())
+                                   for w, (count, rng, path) in enumerate(zip(counts, rngs, paths))]
+        else:
+            shards: list[tuple] = [(dict(gtype=gtype, player_count=player_count, game_count=count,
+                                         player_ante=player_ante, execution=execution,
+                                         player_strategies=player_strategies, engine=engine,
+                                         batch_size=batch_size, deck_model=deck_model,
+                                         starting_chips=starting_chips),
+                                    path, checkpoint_games, workers, rng.bit_generator.state)
+                                   for count, rng, path in zip(counts, rngs,
+                                                               ck.shard_paths(checkpoint_path,
+                                                                              workers))]
+        play = play_games if checkpoint_path is None else ck.play_checkpointed
+        if workers == 1:
+            results: list[an.Analysis] = [play(*shards[0])]
+        else:
+            with mp.Pool(workers) as pool:
+                results: list[an.Analysis] = pool.starmap(play, shards)
+        analysis: an.Analysis = results[0]
+        for result in results[1:]:
+            analysis.merge(result)
+        if stats is not None and workers > 1:
+            for result in results:
+                stats.merge(result.stats)
+            analysis.stats = stats
+    analysis.display_results()
+    if stats is not None:
+        stats.display()
+    return analysis
+
+def batch_values(analysis: an.Analysis, metric: Metric, 
+                 compare: tuple[int, int] | None = None) -> list[float]:
+    ''' 'metric' of every seat in 'analysis' (ROI per turn, or chips won per
+        game), or with 'compare' the difference of its first seat's less its
+        second's. '''
+    values: list[float] = [analysis.roi(s) if metric == Metric.ROI else analysis.chips_per_game(s)
+                           for s in range(analysis.player_count)]
+    return values if compare is None else [values[compare[0]] - values[compare[1]]]
+
+def run_to_precision(gtype: GameType, 
+                     player_count: int, 
+                     player_ante: int, 
+                     execution: p.GameExecution,
+                     player_strategies: list[p.Strategy],
+                     half_width: float,
+                     metric: Metric = Metric.ROI,
+                     compare: tuple[int, int] | None = None,
+                     confidence: float = CONFIDENCE,
+                     batch_games: int = BATCH_GAMES,
+                     min_batches: int = MIN_BATCHES,
+                     max_games: int | None = None,
+                     engine: Engine = Engine.OBJECT,
+                     batch_size: int = BATCH_SIZE,
+                     seed: int | None = None,
+                     workers: int = 1,
+                     deck_model: DeckModel = DeckModel.CARDS) -> an.Analysis:
+    ''' Plays batches of 'batch_games' games until the 'confidence' interval of
+        'metric' is within 'half_width' for every seat, or for the difference
+        between the two seats in 'compare'; displays the results and how many
+        games that took, and returns the Analysis.
+            Intervals are batch means ('analysis.BatchMeans') over at least
+                'min_batches' batches. 'max_games' stops a run that has not
+                converged by then.
+            Every batch shuffles with its own stream spawned from 'seed', and
+                'workers' processes play a batch each per round, so the same
+                seed and worker count give identical results. '''
+    if half_width <= 0:
+        raise ValueError(f'half_width must be positive, not {half_width}')
+    if min_batches < 2:
+        raise ValueError(f'min_batches must be at least 2, not {min_batches}')
+    seeds: np.random.SeedSequence = np.random.SeedSequence(seed)
+    means: an.BatchMeans = an.BatchMeans(player_count if compare is None else 1)
+    analysis: an.Analysis | None = None
+    widths: list[float] = []
+    with worker_pool(workers) as pool:
+        while True:
+            shards: list[tuple] = [(gtype, player_count, batch_games, player_ante, execution, 
+                                    player_strategies, engine, batch_size, 
+                                    np.random.default_rng(stream), deck_model)
+                                   for stream in seeds.spawn(workers)]
+            results: list[an.Analysis] = [play_games(*shards[0])] if pool is None \
+                                         else pool.starmap(play_games, shards)
+            for result in results:
+                means.add(batch_values(result, metric, compare))
+                if analysis is None:
+                    analysis = result
+                else:
+                    analysis.merge(result)
+            widths = means.half_width(confidence)
+            if means.batches >= min_batches and max(widths) <= half_width:
+                break
+            if max_games is not None and analysis.count >= max_games:
+                break
     analysis.display_results()
+    target: str = f'{metric} {"by seat" if compare is None else f"seat {compare[0]} - seat {compare[1]}"}'
+    status: str = 'Converged' if max(widths) <= half_width else 'Not converged'
+    print(f'{status} after {analysis.count} games ({means.batches} batches): '
+          f'{confidence:.0%} half-widths of {target}: '
+          + ' '.join(f'{width:.5f}' for width in widths))
+    return analysis
 
 def main():
     player_count: int = 5
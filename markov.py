@@ -0,0 +1,272 @@
+''' Whole-game values as an absorbing Markov chain.
+        'Game.play_game' is modelled turn by turn: a state is the pot, the seat to
+            play and (when tracking chips) every player's chips; a game is absorbed
+            when its pot empties.
+        Each turn's cards are dealt from a full deck. That is the exact marginal
+            distribution of every turn's cards, but ignores the dependence between
+            turns dealt from the same shuffle, so every value here is approximate:
+            about 0.03 chips per game off simulation for five Crinton players.
+        The transition out of a state comes from the turn outcomes of 'solver.py'
+            applied to its pot with the rules of 'executions.py': bets capped by
+            the pot before the turn, and Gamblor side bets paid left to right while
+            the pot covers them. '''
+from typing import NamedTuple
+import numpy as np
+import cards as c
+import solver as so
+import compiled as cs
+import protocols as p
+import main as m
+
+# (probability, first bet, its result, second bet, its result, side bet results)
+# A bet of zero pays its result outright: one for a zero bet, zero for no bet.
+type Outcome = tuple[float, int, int, int, int, tuple[int, ...]]
+
+MAX_POT: int     = 1000
+MAX_TURNS: int   = 20000
+TOLERANCE: float = 1e-12
+CHIPS_TOLERANCE: float = 1e-9
+
+class GameValue(NamedTuple):
+    ''' Expected results of a game, per seat.
+            'length' is the probability that a game lasts each number of turns.
+            'truncated_mass' is the probability the model did not follow to the
+                end (unabsorbed after 'max_turns', pots beyond 'max_pot' or pruned
+                states). Those games are settled by sharing their pot equally,
+                so no chips go missing: the nets sum to minus 'unclaimed', the
+                expected pot of games nobody had chips left to play for, plus
+                what Steve turns overdraw (their second bet is capped by the pot
+                from before the turn).
+            'error_bound' is 'truncated_mass' times the largest pot settled, and
+                'roi_bound' that over each seat's turns: they bound the error
+                the settlement makes in 'expected_net' and 'roi' as long as no
+                truncated game would have moved a seat by more than one such pot.
+                Neither covers the full-deck approximation. '''
+    expected_net: list[float]
+    turns: list[float]
+    roi: list[float]
+    length: np.ndarray
+    truncated_mass: float
+    unclaimed: float
+    error_bound: float
+    roi_bound: list[float]
+
+def turn_outcomes(gtype: m.GameType, strategies: list[p.Strategy], seat: int) -> list[Outcome]:
+    ''' Every distinct outcome of a turn by 'seat', before the pot caps any bet.
+        Bets are the strategy bets (zero for a gap under two); results are payouts
+        per chip from 'cards.py'; side bet results are zero for seats not betting.
+        A zero bet collects one, so its result is one. '''
+    strategies = [cs.compile_strategy(strategy) for strategy in strategies]
+    strategy: p.Strategy = strategies[seat]
+    outcomes: dict[tuple, float] = {}
+    def add(prob: float, key: tuple) -> None:
+        outcomes[key] = outcomes.get(key, 0.0) + prob
+    for (left, right, after), prob in so.deal_odds(so.FULL_DECK, strategy).items():
+        bet: int = 0 if c.GAP[left][right] < 2 else strategy.bet_strategy(left, right)
+        if bet == 0:
+            add(prob, (0, 1, 0, 0, (0,)*len(strategies)))
+            continue
+        total: int = sum(after)
+        for middle, count in zip(so.COUNT_RANKS, after):
+            if not count:
+                continue
+            pm: float   = prob*count/total
+            result: int = c.STANDARD_PAYOUT[middle][left][right]
+            sides: tuple[int, ...] = (0,)*len(strategies)
+            if gtype == m.GameType.GAMBLOR:
+                sides = tuple(c.GAMBLOR_PAYOUT[middle][left][right] \
+                              if op != seat and \
+                                 strategies[op].default_gamblor_strategy(left, right) == 1 \
+                              else 0 for op in range(len(strategies)))
+            if gtype != m.GameType.STEVE:
+                add(pm, (bet, result, 0, 0, sides))
+                continue
+            nl, nr = strategy.steve_choose_leftright(left, middle, right)
+            bet2: int = 0 if c.GAP[nl][nr] < 2 else strategy.bet_strategy(nl, nr)
+            if bet2 == 0:
+                add(pm, (bet, result, 0, 1, sides))
+                continue
+            after2: tuple[int, ...] = so.remove(after, middle)
+            for third, count2 in zip(so.COUNT_RANKS, after2):
+                if count2:
+                    add(pm*count2/(total-1),
+                        (bet, result, bet2, c.STANDARD_PAYOUT[third][nl][nr], sides))
+    return [(prob,) + key for key, prob in outcomes.items()]
+
+def bet_payout(bet: int, result: int, pot: np.ndarray) -> np.ndarray:
+    ''' Payout of one bet for each pot; a zero bet pays its result outright. '''
+    return result if bet == 0 else np.minimum(bet, pot)*result
+
+def turn_payouts(outcome: Outcome, seat: int, pot: np.ndarray) -> np.ndarray:
+    ''' Payouts of an outcome to every seat (rows), for each pot before the turn. '''
+    _, bet, result, bet2, result2, sides = outcome
+    payouts: np.ndarray = np.zeros((len(sides), len(pot)), dtype=np.int64)
+    payouts[seat] = bet_payout(bet, result, pot) + bet_payout(bet2, result2, pot)
+    paid: np.ndarray = payouts[seat].copy()
+    for op, side in enumerate(sides):
+        if side:
+            applied: np.ndarray = (side < 0) | (pot - paid >= side)
+            payouts[op] = np.where(applied, side, 0)
+            paid += payouts[op]
+    return payouts
+
+def transition(gtype: m.GameType, strategies: list[p.Strategy], seat: int, max_pot: int) \
+    -> tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    ''' Transition and payout matrices of a turn by 'seat', for pots 1..max_pot.
+            'moves'    [pot, pot after]: pot after 0 means the game ends, and
+                max_pot+1 that the pot grew beyond the model.
+            'payouts'  [pot, seat]: expected payout to each seat.
+            'overflow' [pot]: expected pot after of the moves beyond the model,
+                and the largest such pot. '''
+    pot: np.ndarray      = np.arange(1, max_pot+1)
+    moves: np.ndarray    = np.zeros((max_pot+1, max_pot+2))
+    payouts: np.ndarray  = np.zeros((max_pot+1, len(strategies)))
+    overflow: np.ndarray = np.zeros(max_pot+1)
+    largest: int = 0
+    for outcome in turn_outcomes(gtype, strategies, seat):
+        pays: np.ndarray = turn_payouts(outcome, seat, pot)
+        after: np.ndarray = pot - pays.sum(axis=0)
+        beyond: np.ndarray = after > max_pot
+        np.add.at(moves, (pot, np.clip(after, 0, max_pot+1)), outcome[0])
+        payouts[1:]  += outcome[0]*pays.T
+        overflow[1:] += outcome[0]*np.where(beyond, after, 0)
+        largest = max(largest, int(after.max()) if beyond.any() else 0)
+    return moves, payouts, overflow, largest
+
+def _game_value(net: np.ndarray, turns: np.ndarray, length: np.ndarray, truncated_mass: float,
+                settled: float, largest: int, unclaimed: float = 0.0) -> GameValue:
+    ''' Results with 'settled', the truncated games' expected pot, shared equally. '''
+    net = net + settled/len(net)
+    error_bound: float = truncated_mass*largest
+    return GameValue(expected_net=net.tolist(),
+                     turns=turns.tolist(),
+                     roi=[n/t if t else 0.0 for n, t in zip(net, turns)],
+                     length=length,
+                     truncated_mass=truncated_mass,
+                     unclaimed=unclaimed,
+                     error_bound=error_bound,
+                     roi_bound=[error_bound/t if t else float('inf') for t in turns])
+
+def solve_game(gtype: m.GameType,
+               player_count: int,
+               player_ante: int,
+               player_strategies: list[p.Strategy],
+               max_pot: int = MAX_POT,
+               max_turns: int = MAX_TURNS,
+               tolerance: float = TOLERANCE) -> GameValue:
+    ''' Approximate expected net chips, turns and ROI per seat, and the
+        distribution of game length, assuming no player runs out of chips. With
+        starting chips far above a game's swings (160 against a standard
+        deviation near 15) that is the approximation that matters least;
+        'solve_game_chips' tracks chips.
+        The pot is the whole state, so the chain is solved with one matrix product
+        per turn until less than 'tolerance' of the probability is left. '''
+    if player_ante*player_count > max_pot:
+        raise ValueError(f'Starting pot {player_ante*player_count} exceeds max_pot {max_pot}')
+    matrices: list[tuple[np.ndarray, np.ndarray, np.ndarray, int]] = \
+        [transition(gtype, player_strategies, seat, max_pot) for seat in range(player_count)]
+    mass: np.ndarray   = np.zeros(max_pot+1)
+    mass[player_ante*player_count] = 1.0
+    net: np.ndarray    = np.full(player_count, -float(player_ante))
+    turns: np.ndarray  = np.zeros(player_count)
+    length: list[float] = [0.0]
+    lost: float    = 0.0
+    settled: float = 0.0
+    largest: int   = 0
+    for turn in range(max_turns):
+        if mass.sum() < tolerance:
+            break
+        seat: int = turn % player_count
+        moves, payouts, overflow, beyond = matrices[seat]
+        turns[seat] += mass.sum()
+        net  += mass @ payouts
+        after: np.ndarray = mass @ moves
+        length.append(after[0])
+        if after[-1] > 0:
+            lost    += after[-1]
+            settled += mass @ overflow
+            largest  = max(largest, beyond)
+        mass  = after[:-1]
+        mass[0] = 0.0
+    left: np.ndarray = np.flatnonzero(mass)
+    if left.size:
+        settled += mass @ np.arange(max_pot+1)
+        largest  = max(largest, int(left[-1]))
+    return _game_value(net, turns, np.array(length), lost + mass.sum(), settled, largest)
+
+def solve_game_chips(gtype: m.GameType,
+                     player_count: int,
+                     player_ante: int,
+                     player_strategies: list[p.Strategy],
+                     starting_chips: int = m.STARTING_CHIPS,
+                     max_pot: int | None = None,
+                     max_turns: int = MAX_TURNS,
+                     tolerance: float = CHIPS_TOLERANCE) -> GameValue:
+    ''' As 'solve_game', but a state also holds every player's chips, so players
+        without chips are skipped as 'Game.play_game' skips them. The state space
+        grows quickly with players and chips: this is for small tables and stacks.
+        States less likely than 'tolerance' are pruned into the truncated mass, as are
+        pots beyond 'max_pot' (default: all the chips at the table). A game in
+        which nobody has chips left ends with its pot unclaimed, as it does in
+        'Game.play_game'. '''
+    table_chips: int = player_count*starting_chips
+    max_pot = table_chips if max_pot is None else max_pot
+    pot: np.ndarray = np.arange(1, max_pot+1)
+    moves: list[list[list[tuple[float, tuple[int, ...]]]]] = []
+    for seat in range(player_count):
+        by_pot: list[dict[tuple[int, ...], float]] = [{} for _ in range(max_pot+1)]
+        for outcome in turn_outcomes(gtype, player_strategies, seat):
+            for pt, pays in zip(pot.tolist(), turn_payouts(outcome, seat, pot).T.tolist()):
+                key: tuple[int, ...] = tuple(pays)
+                by_pot[pt][key] = by_pot[pt].get(key, 0.0) + outcome[0]
+        moves.append([list(outcomes.items()) for outcomes in by_pot])
+    states: dict[tuple[int, int, tuple[int, ...]], float] = \
+        {(player_ante*player_count, 0, (starting_chips-player_ante,)*player_count): 1.0}
+    net: np.ndarray   = np.full(player_count, -float(player_ante))
+    turns: np.ndarray = np.zeros(player_count)
+    length: list[float] = [0.0]
+    lost: float      = 0.0
+    settled: float   = 0.0
+    largest: int     = 0
+    unclaimed: float = 0.0
+    def settle(pt: int, prob: float) -> None:
+        nonlocal lost, settled, largest
+        lost    += prob
+        settled += prob*pt
+        largest  = max(largest, pt)
+    for _ in range(max_turns):
+        if sum(states.values()) < tolerance:
+            break
+        after: dict[tuple[int, int, tuple[int, ...]], float] = {}
+        ended: float = 0.0
+        for (pt, seat, chips), prob in states.items():
+            turns[seat] += prob
+            for pays, pp in moves[seat][pt]:
+                q: float = prob*pp
+                net += q*np.array(pays)
+                npot: int = pt - sum(pays)
+                if npot <= 0:
+                    ended += q
+                    continue
+                nchips: tuple[int, ...] = tuple(ch+pay for ch, pay in zip(chips, pays))
+                players: list[int] = [(seat+k) % player_count for k in range(1, player_count+1) 
+                                      if nchips[(seat+k) % player_count] > 0]
+                if not players:
+                    ended     += q
+                    unclaimed += q*npot
+                    continue
+                if npot > max_pot:
+                    settle(npot, q)
+                    continue
+                key = (npot, players[0], nchips)
+                after[key] = after.get(key, 0.0) + q
+        length.append(ended)
+        states = {}
+        for key, prob in after.items():
+            if prob < tolerance:
+                settle(key[0], prob)
+            else:
+                states[key] = prob
+    for key, prob in states.items():
+        settle(key[0], prob)
+    return _game_value(net, turns, np.array(length), lost, settled, largest, unclaimed)
@@ -0,0 +1,199 @@
+''' Search for a dominant strategy (README Section 6).
+        A strategy is a point in a parameter space, StrategyParams: Ace choices,
+            bet size per gap, Steve's preference between gaps and the Gamblor
+            side bet threshold. DEFAULT_PARAMS reproduce the default strategies.
+        'optimize' draws candidates around the defaults and races them by
+            successive halving: every round plays all survivors against a field
+            of default players on the same deals ('comparison.py'), doubles the
+            deals, and keeps the better half. The winner is then confirmed on
+            fresh deals, which gives its confidence bounds against the default. '''
+from statistics import NormalDist
+from typing import NamedTuple
+import numpy as np
+import analysis as an
+import cards as c
+import comparison as co
+import crinton as cr
+import steve as st
+import main as m
+import protocols as p
+import strategies as s
+from strategies import Rank
+
+# Bet sizes a mutation steps between; 1000000 bets the pot.
+BET_LADDER: tuple[int, ...] = (0, 1, 2, 3, 4, 6, 8, 12, 16, 24, 32, 1000000)
+CANDIDATES: int    = 16
+MUTATIONS: int     = 3
+FIRST_DEALS: int   = 50
+CONFIRM_DEALS: int = 2000
+
+class StrategyParams(NamedTuple):
+    ''' A strategy as parameters.
+            'left_ace': rank of a left Ace (L or H).
+            'right_ace': a right Ace is H when the left rank is at most this, else L
+                (an Ace on the left always gets the opposite end).
+            'bets': bet size per gap, 0 .. 13 (gaps under two never bet).
+            'gap_scores': Steve keeps the gap with the higher score, the left on
+                a tie.
+            'side_bet_gap': Gamblor side bets when the outer gap is at least this. '''
+    left_ace: Rank
+    right_ace: Rank
+    bets: tuple[int, ...]
+    gap_scores: tuple[float, ...]
+    side_bet_gap: int
+
+DEFAULT_PARAMS = StrategyParams(left_ace=c.L,
+                                right_ace=7,
+                                bets=tuple(s.DEFAULT_BET[gap] for gap in range(len(c.STRAT_RANKS))),
+                                gap_scores=(10.5, 10.5, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13),
+                                side_bet_gap=7)
+
+class ParamCrintonStrategy(cr.CrintonStrategy):
+    ''' Crinton player strategy given by StrategyParams. '''
+    def __init__(self, params: StrategyParams = DEFAULT_PARAMS, name: str | None = None):
+        self.params: StrategyParams = params
+        self.name = type(self).__name__ if name is None else name
+    def left_ace(self, left: Rank=None) -> Rank:
+        return self.params.left_ace
+    def right_ace(self, left: Rank) -> Rank:
+        if left in c.ENDS:
+            return c.H if left == c.L else c.L
+        return c.H if left <= self.params.right_ace else c.L
+    def bet_strategy(self, left: Rank, right: Rank) -> int:
+        return self.params.bets[c.GAP[left][right]]
+
+class ParamSteveStrategy(ParamCrintonStrategy):
+    ''' Steve player strategy given by StrategyParams. '''
+    def choose_left_gap(self, left: Rank, middle: Rank, right: Rank) -> bool:
+        mid: int = c.SRANK[middle][left][right]
+        return self.params.gap_scores[c.GAP[left][mid]] >= self.params.gap_scores[c.GAP[mid][right]]
+    steve_choose_leftright = st.SteveStrategy.steve_choose_leftright
+
+class ParamGamblorStrategy(ParamCrintonStrategy):
+    ''' Gamblor player strategy given by StrategyParams. '''
+    def default_gamblor_strategy(self, left: Rank, right: Rank) -> int:
+        return 1 if 13 - right + left >= self.params.side_bet_gap else 0
+
+# The StrategyParams strategy of each game, played with its 'main.GAMES' execution.
+PARAM_STRATEGIES = {m.GameType.CRINTON: ParamCrintonStrategy,
+                    m.GameType.STEVE:   ParamSteveStrategy,
+                    m.GameType.GAMBLOR: ParamGamblorStrategy}
+
+class Optimization(NamedTuple):
+    ''' Result of 'optimize'.
+            'rounds': per round, the deals played and each survivor's params with
+                its mean difference against the default so far.
+            'confirmation': the winner against the default on fresh deals. '''
+    best: StrategyParams
+    rounds: list[tuple[int, list[tuple[StrategyParams, float]]]]
+    confirmation: co.Comparison
+
+def mutate(gtype: m.GameType, params: StrategyParams, rng: np.random.Generator) -> StrategyParams:
+    ''' Changes one parameter of 'params' that matters to 'gtype' by one step. '''
+    fields: list[str] = ['left_ace', 'right_ace', 'bets']
+    if gtype == m.GameType.STEVE:
+        fields.append('gap_scores')
+    if gtype == m.GameType.GAMBLOR:
+        fields.append('side_bet_gap')
+    field: str = fields[rng.integers(len(fields))]
+    step: int  = 1 if rng.random() < 0.5 else -1
+    if field == 'left_ace':
+        return params._replace(left_ace=c.H if params.left_ace == c.L else c.L)
+    if field == 'right_ace':
+        return params._replace(right_ace=int(np.clip(params.right_ace + step, 1, 12)))
+    if field == 'side_bet_gap':
+        return params._replace(side_bet_gap=int(np.clip(params.side_bet_gap + step, 0, 14)))
+    gap: int = int(rng.integers(2, len(c.STRAT_RANKS)))
+    if field == 'bets':
+        ladder: list[int] = sorted(set(BET_LADDER) | {params.bets[gap]})
+        i: int = int(np.clip(ladder.index(params.bets[gap]) + step, 0, len(ladder)-1))
+        return params._replace(bets=params.bets[:gap] + (ladder[i],) + params.bets[gap+1:])
+    other: int = int(np.clip(gap + step, 0, len(c.STRAT_RANKS)-1))
+    scores: list[float] = list(params.gap_scores)
+    scores[gap], scores[other] = scores[other], scores[gap]
+    return params._replace(gap_scores=tuple(scores))
+
+def candidates(gtype: m.GameType, count: int, mutations: int,
+               rng: np.random.Generator) -> list[StrategyParams]:
+    ''' 'count' distinct candidates, each up to 'mutations' steps from the
+        defaults. '''
+    found: list[StrategyParams] = []
+    for _ in range(100*count):
+        if len(found) == count:
+            break
+        params: StrategyParams = DEFAULT_PARAMS
+        for _ in range(int(rng.integers(1, mutations+1))):
+            params = mutate(gtype, params, rng)
+        if params != DEFAULT_PARAMS and params not in found:
+            found.append(params)
+    return found
+
+def optimize(gtype: m.GameType,
+             player_count: int,
+             player_ante: int,
+             candidate_count: int = CANDIDATES,
+             mutations: int = MUTATIONS,
+             first_deals: int = FIRST_DEALS,
+             confirm_deals: int = CONFIRM_DEALS,
+             seed: int | None = None,
+             workers: int = 1,
+             confidence: float = m.CONFIDENCE) -> Optimization:
+    ''' Races 'candidate_count' strategies of 'gtype' against the default one
+        in a field of default players, with seat rotation and common deals.
+        Round k plays 'first_deals'*2**k new deals for every survivor and keeps
+        the better half by chips won per game (over all its deals so far), until
+        one is left; it is then played on 'confirm_deals' fresh deals. Displays and returns the result,
+        with a 'confidence' interval of the best strategy's gain. '''
+    execution: p.GameExecution = m.GAMES[gtype][0]
+    strategy_class: type = PARAM_STRATEGIES[gtype]
+    seeds: np.random.SeedSequence = np.random.SeedSequence(seed)
+    rng: np.random.Generator = np.random.default_rng(seeds)
+    default = strategy_class(DEFAULT_PARAMS, name='default')
+    def arm(params: StrategyParams, name: str) -> co.Arm:
+        return co.Arm(gtype, execution, strategy_class(params, name), default)
+    survivors: list[StrategyParams] = candidates(gtype, candidate_count, mutations, rng)
+    if not survivors:
+        raise ValueError(f'No candidates found for {gtype}')
+    results: dict[StrategyParams, an.BatchMeans] = {}
+    rounds: list[tuple[int, list[tuple[StrategyParams, float]]]] = []
+    seats: list[int] = list(range(player_count))
+    start: int = 0
+    deals: int = first_deals
+    with m.worker_pool(workers) as pool:
+        while True:
+            arms: list[co.Arm] = [arm(DEFAULT_PARAMS, 'default')] + \
+                                 [arm(params, f'candidate {i}') for i, params in enumerate(survivors)]
+            stats, _ = co.run_deals(arms, player_count, player_ante, seeds.entropy,
+                                    range(start, start+deals), seats, workers, pool)
+            n: int = len(arms)
+            for i, params in enumerate(survivors):
+                result: an.BatchMeans = stats.select([2*n + i])
+                if params in results:
+                    results[params].merge(result)
+                else:
+                    results[params] = result
+            ranked: list[StrategyParams] = sorted(survivors, key=lambda params: -results[params].mean[0])
+            rounds.append((deals, [(params, results[params].mean[0]) for params in ranked]))
+            print(f'Round {len(rounds)}: {len(survivors)} candidates, {deals} deals, '
+                  f'best {results[ranked[0]].mean[0]:+.4f} chips/game vs default')
+            survivors = ranked[:(len(survivors)+1)//2]
+            start += deals
+            deals *= 2
+            if len(survivors) == 1:
+                break
+        stats, games = co.run_deals([arm(DEFAULT_PARAMS, 'default'), arm(survivors[0], 'best')],
+                                    player_count, player_ante, seeds.entropy,
+                                    range(start, start+confirm_deals), seats, workers, pool)
+    confirmation: co.Comparison = co.comparison_of([arm(DEFAULT_PARAMS, 'default'),
+                                                    arm(survivors[0], 'best')], stats, games)
+    optimization = Optimization(best=survivors[0], rounds=rounds, confirmation=confirmation)
+    display_optimization(optimization, confidence)
+    return optimization
+
+def display_optimization(optimization: Optimization, confidence: float = m.CONFIDENCE) -> None:
+    confirmation: co.Comparison = optimization.confirmation
+    z: float = NormalDist().inv_cdf((1 + confidence)/2)
+    low, high = (confirmation.difference[1] + sign*z*confirmation.stderr[1] for sign in (-1, 1))
+    print(f'Best: {optimization.best}')
+    print(f'  vs default on {confirmation.deals} fresh deals: '
+          f'{confirmation.difference[1]:+.4f} chips/game, {confidence:.0%} bounds [{low:+.4f}, {high:+.4f}]')
@@ -1,10 +1,14 @@
 import protocols as p
+import compiled as cs
 
 class Player:
+    ''' A seat at the table. Chips won in a game are 'chips' less the chips
+        the player started with. '''
+    __slots__ = ('chips', 'strategy', 'table', 'turns')
     def __init__(self, \
                  chips: int, \
                  strategy: p.Strategy) -> None:
         self.chips: int           = chips
         self.strategy: p.Strategy = strategy
+        self.table: cs.CompiledStrategy = cs.compile_strategy(strategy)
         self.turns: int           = 0
-        self.payouts: list[int]   = []
@@ -1,22 +1,30 @@
 from typing import Protocol
 from player import Player
 
-type Rank = str
-
-STRAT_RANKS = 'L23456789TJQKH'
+type Rank = int
 
 class GameExecution(Protocol):
     ''' Protocol for executing a turn of a game for a player.
             'deal_leftright' delivers left and right cards, handles ranking Aces,
                and ensures left card is lower ranked than right card.
-            'choose_bet' makes the betting decision and refers to strategy as needed.
+            'choose_bet' makes the betting decision and refers to strategy as needed,
+                through the player's compiled decision tables ('table').
             'get_payout' resolves the turn and determines the payout to the player. 
+        An execution is made once per seat and reused for all its turns: 'pot' is
+            set before each turn, and 'execute' returns 'payouts', a ledger of
+            every seat's payout that it rewrites each turn.
+        'recorder', when a 'turnlog.TurnRecorder', is handed every turn 'execute' plays.
     '''
     def __init__(self, current_player: Player, players: list[Player], pot) -> int:
         self.player = current_player
         self.players = players
+        self.seat = players.index(current_player)
         self.strategy = self.player.strategy
+        self.table = self.player.table
         self.pot = pot
+        self.payouts = [0]*len(players)
+        self.no_payouts = [0]*len(players)
+        self.recorder = None
 
     def deal_leftright() -> tuple[Rank, Rank]:
         ...   
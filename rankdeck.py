@@ -0,0 +1,45 @@
+''' A deck kept as 13 rank counts instead of a shuffled list of cards.
+        No rule looks at suits, so dealing from a shuffled deck is the same as
+            drawing each card's rank with probability proportional to the cards
+            of that rank left, which is what 'RankDeck.pop' does.
+        A drawn card is returned as a representative int card (see 'cards.py'):
+            the right rank, and distinct from every other card drawn since the
+            last reshuffle. '''
+import numpy as np
+import cards as c
+
+# Uniform draws fetched from the random generator at a time.
+UNIFORM_BUFFER: int = 256
+
+class RankDeck:
+    ''' Counts of the cards left per rank, in CARD_RANKS order.
+            'reshuffle' restores every card except the 'reserved' ones.
+            'pop' and 'len' are all the executions ask of a deck. '''
+    def __init__(self, rng: np.random.Generator, reserved: list[int] = ()) -> None:
+        self.rng: np.random.Generator = rng
+        self.uniforms: list[float]    = []
+        self.next: int                = 0
+        self.reshuffle(reserved)
+
+    def reshuffle(self, reserved: list[int] = ()) -> None:
+        self.counts: list[int] = [4]*len(c.CARD_RANKS)
+        for card in reserved:
+            self.counts[card//4] -= 1
+        self.size: int = sum(self.counts)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def pop(self) -> int:
+        if self.next == len(self.uniforms):
+            self.uniforms = self.rng.random(UNIFORM_BUFFER).tolist()
+            self.next = 0
+        k: int = int(self.uniforms[self.next]*self.size)
+        self.next += 1
+        for i, count in enumerate(self.counts):
+            if k < count:
+                self.counts[i] -= 1
+                self.size -= 1
+                return 4*i + self.counts[i]
+            k -= count
+        raise IndexError('pop from empty RankDeck')
@@ -0,0 +1,127 @@
+''' Exact turn odds from the composition of the remaining deck.
+        A deck state is a tuple of 13 counts, one per rank in CARD_RANKS order
+            ('2' .. 'K', 'A'); FULL_DECK holds four of each.
+        Every function is memoized on its arguments, so repeated questions about
+            the same deck state are dictionary lookups. '''
+from functools import cache
+from typing import NamedTuple
+import cards as c
+import protocols as p
+from strategies import Rank
+
+FULL_DECK: tuple[int, ...] = (4,)*len(c.CARD_RANKS)
+
+# Rank (see 'cards.py') of each entry of a deck state.
+COUNT_RANKS: tuple[int, ...] = tuple(c.RANK[4*i] for i in range(len(c.CARD_RANKS)))
+
+class Odds(NamedTuple):
+    ''' Probabilities of the results of a bet, and its expected payout. '''
+    win: float
+    lose: float
+    post: float
+    ev: float
+
+def deck_counts(deck: list[int]) -> tuple[int, ...]:
+    ''' Deck state of a list of int cards. '''
+    counts: list[int] = [0]*len(c.CARD_RANKS)
+    for card in deck:
+        counts[card//4] += 1
+    return tuple(counts)
+
+def remove(counts: tuple[int, ...], rank: Rank) -> tuple[int, ...]:
+    ''' Deck state after dealing one card of 'rank' (ACE for an Ace). '''
+    i: int = COUNT_RANKS.index(rank)
+    return counts[:i] + (counts[i]-1,) + counts[i+1:]
+
+def _middle_odds(table: list[list[list[int]]], counts: tuple[int, ...],
+                 left: Rank, right: Rank) -> tuple[float, float, float]:
+    total: int = sum(counts)
+    results: dict[int, float] = {c.WIN: 0.0, c.LOSE: 0.0, c.POST: 0.0}
+    for rank, count in zip(COUNT_RANKS, counts):
+        if count:
+            results[table[rank][left][right]] += count/total
+    return results[c.WIN], results[c.LOSE], results[c.POST]
+
+def payout_ev(win: float, lose: float, post: float, bet: int) -> float:
+    ''' Expected payout of a bet; a zero bet always collects one. '''
+    return 1.0 if bet == 0 else bet*(c.WIN*win + c.LOSE*lose + c.POST*post)
+
+@cache
+def crinton_odds(counts: tuple[int, ...], left: Rank, right: Rank, bet: int = 1) -> Odds:
+    ''' Odds of a Crinton bet on ranked 'left' and 'right' cards, the middle card
+        drawn from 'counts' (a middle Ace ranks low). '''
+    win, lose, post = _middle_odds(c.STANDARD_PAYOUT, counts, left, right)
+    return Odds(win, lose, post, payout_ev(win, lose, post, bet))
+
+@cache
+def gamblor_odds(counts: tuple[int, ...], left: Rank, right: Rank) -> Odds:
+    ''' Odds of a Gamblor side bet of one against ranked 'left' and 'right' cards.
+        Ignores the pot running dry, which only ever cancels winning side bets. '''
+    win, lose, post = _middle_odds(c.GAMBLOR_PAYOUT, counts, left, right)
+    return Odds(win, lose, post, payout_ev(win, lose, post, 1))
+
+def choose_bet(strategy: p.Strategy, left: Rank, right: Rank, pot: int) -> int:
+    ''' The bet 'executions.default_choose_bet' makes. '''
+    return 0 if c.GAP[left][right] < 2 else min(strategy.bet_strategy(left, right), pot)
+
+@cache
+def steve_odds(counts: tuple[int, ...], left: Rank, middle: Rank, right: Rank,
+               strategy: p.Strategy, pot: int, left_gap: bool | None = None) -> Odds:
+    ''' Odds of Steve's second bet, after 'middle' is dealt between ranked 'left'
+        and 'right' and removed from 'counts'. The gap is the strategy's choice
+        ('steve_choose_leftright'), or the left or right gap if 'left_gap' is
+        given, so both choices can be compared. The bet is capped by 'pot', the
+        pot from before the turn. A zero bet draws no card, so its probabilities
+        are all zero and its 'ev' is the one it collects. '''
+    if left_gap is None:
+        nl, nr = strategy.steve_choose_leftright(left, middle, right)
+    else:
+        nl: Rank = left   if left_gap else middle
+        nr: Rank = middle if left_gap else right
+        nl = c.L if nl == c.ACE else nl
+        nr = c.H if nr == c.ACE else nr
+    bet: int = choose_bet(strategy, nl, nr, pot)
+    if bet == 0:
+        return Odds(0.0, 0.0, 0.0, payout_ev(0.0, 0.0, 0.0, bet))
+    win, lose, post = _middle_odds(c.STANDARD_PAYOUT, counts, nl, nr)
+    return Odds(win, lose, post, payout_ev(win, lose, post, bet))
+
+@cache
+def deal_odds(counts: tuple[int, ...], strategy: p.Strategy) \
+    -> dict[tuple[Rank, Rank, tuple[int, ...]], float]:
+    ''' Probability of each deal of ranked, ordered (left, right) cards, with the
+        strategy's Ace choices, keyed with the deck state left after the deal. '''
+    total: int = sum(counts)
+    deals: dict[tuple[Rank, Rank, tuple[int, ...]], float] = {}
+    for first, count1 in zip(COUNT_RANKS, counts):
+        if not count1:
+            continue
+        after1: tuple[int, ...] = remove(counts, first)
+        for second, count2 in zip(COUNT_RANKS, after1):
+            if not count2:
+                continue
+            left: Rank  = strategy.left_ace() if first == c.ACE else first
+            right: Rank = strategy.right_ace(left=left) if second == c.ACE else second
+            if left > right:
+                left, right = right, left
+            key = (left, right, remove(after1, second))
+            deals[key] = deals.get(key, 0.0) + count1/total * count2/(total-1)
+    return deals
+
+@cache
+def crinton_turn_odds(counts: tuple[int, ...], strategy: p.Strategy, pot: int) -> Odds:
+    ''' Odds of a whole Crinton turn before the deal, betting as 'strategy' does
+        against 'pot'. A zero bet counts as a win of one. '''
+    win = lose = post = ev = 0.0
+    for (left, right, after), prob in deal_odds(counts, strategy).items():
+        bet: int = choose_bet(strategy, left, right, pot)
+        if bet == 0:
+            win += prob
+            ev  += prob
+            continue
+        odds: Odds = crinton_odds(after, left, right, bet)
+        win  += prob*odds.win
+        lose += prob*odds.lose
+        post += prob*odds.post
+        ev   += prob*odds.ev
+    return Odds(win, lose, post, ev)
@@ -1,6 +1,8 @@
 from protocols import Strategy, GameExecution
+import cards as c
 import strategies as s
 import executions as ex
+import turnlog as tl
 
 
 class SteveStrategy(Strategy):
@@ -18,11 +20,9 @@ class SteveStrategy(Strategy):
     def choose_left_gap(self, left: s.Rank, middle: s.Rank, right: s.Rank) -> bool:
         ''' Returns True when left gap is larger than right gap, unless there's 
             a gap of zero or one, which is always chosen. '''
-        leftend:  int = s.srank(left,(left,right))
-        rightend: int = s.srank(right,(left,right))
-        mid:  int = s.srank(middle,(left,right))                                 
-        lgap: int = abs(mid-leftend)
-        rgap: int = abs(rightend-mid)
+        mid:  int = c.SRANK[middle][left][right]
+        lgap: int = c.GAP[left][mid]
+        rgap: int = c.GAP[mid][right]
         if lgap in [0,1]:         
             return rgap <= 10
         if lgap in [2,3,4,5,6,7]: 
@@ -39,10 +39,10 @@ class SteveStrategy(Strategy):
         left_gap: bool = self.choose_left_gap(left, middle, right)
         nl: s.Rank     = left   if left_gap else middle
         nr: s.Rank     = middle if left_gap else right
-        if nl=='A': 
-            nl='L'
-        if nr=='A': 
-            nr='H'
+        if nl==c.ACE: 
+            nl=c.L
+        if nr==c.ACE: 
+            nr=c.H
         return nl, nr
 
 class SteveExecution(GameExecution):
@@ -50,24 +50,26 @@ class SteveExecution(GameExecution):
             Handles main player like Crinton, except:
                 Chooses largest gap to bet with 'steve_choose_leftright'.
     '''
-    def execute(self, deck: list[str]) -> int:
-        payouts: dict[int,int]
+    def execute(self, deck: list[int]) -> tuple[list[int], list[int]]:
+        payouts: list[int]
         left: s.Rank
         middle: s.Rank
         right: s.Rank
-        payouts, left, middle, right, deck, _ = ex.crinton_execute(self, deck)
+        bet: int
+        payouts, left, middle, right, deck, bet = ex.crinton_execute(self, deck)
         payout: int = 0
-        if self.player.chips > 0 and self.pot > 0 and middle:
-            nl: s.Rank
-            nr: s.Rank
-            nl, nr = self.strategy.steve_choose_leftright(left, middle, right)
-            bet: int               = self.choose_bet(left=nl, right=nr)
-            xmiddle: s.Rank
-            payout, xmiddle, deck  = self.get_payout(bet, deck, left=nl, right=nr)
-        if payout:
-            for p in range(len(self.players)):
-                if self.player==self.players[p]:
-                    payouts[p] += payout
+        nl: s.Rank = tl.NO_CARD
+        nr: s.Rank = tl.NO_CARD
+        bet2: int  = 0
+        xmiddle: s.Rank | None = tl.NO_CARD
+        if self.player.chips > 0 and self.pot > 0 and middle is not None:
+            nl, nr = self.table.leftright_table[left][middle][right]
+            bet2                   = self.choose_bet(left=nl, right=nr)
+            payout, xmiddle, deck  = self.get_payout(bet2, deck, left=nl, right=nr)
+        payouts[self.seat] += payout
+        if self.recorder is not None:
+            self.recorder.record(self, payouts, left, middle, right, bet, 
+                                 payouts[self.seat] - payout, nl, xmiddle, nr, bet2, payout)
         return payouts, deck
 
     deal_leftright = ex.default_deal_leftright
@@ -75,7 +77,9 @@ class SteveExecution(GameExecution):
     get_payout     = ex.get_standard_payout
 
 
-''' OLD SCHOOL
+# Results of the original engine over 100M games of five default players,
+# checked against by 'equivalence.check_archive'.
+OLD_SCHOOL: str = ''' OLD SCHOOL
 crinton	Number of games: 100000000	Ante: 4
 Player 0  Strategies: default_strategy	Turns: 1212274237	Chips Won:  13198830	ROIt:    0.01089	Chips Won/g:    0.132   14.930
 Player 1  Strategies: default_strategy	Turns: 1192117310	Chips Won:   6641883	ROIt:    0.00557	Chips Won/g:    0.066   14.824
@@ -1,55 +1,48 @@
-from functools import cache
+import cards as c
 
-STRAT_RANKS = 'L23456789TJQKH'
+STRAT_RANKS = c.STRAT_RANKS
 
-type Rank = str
+type Rank = int
 
-@cache
-def crank(card:str) -> Rank:
-    ''' Given a card ("8C"), returns the rank ("8"). '''
-    return card[0]
+def crank(card: int) -> Rank:
+    ''' Given a card (an int, see 'cards.py'), returns its rank. '''
+    return c.RANK[card]
 
-@cache
 def srank(cr: Rank, lr: tuple[Rank,Rank]=None) -> int | None:
-    ''' Returns the numerical rank of cr according to its index in STRAT_RANKS.
+    ''' Returns the numerical rank of cr, its index in STRAT_RANKS.
         Handles "cr is Ace" differently, in order to catch all cases when the 
         middle card is an Ace and matches one of the L/R cards: 
             If one of lr is an ace (L or H), match that value.
             Otherwise return L or H, whichever maximizes the gap between it 
-                and the furthest L/R (for Steve purposes). '''
+                and the furthest L/R (for Steve purposes).
+        Ranks other than ACE are already numerical; Aces are looked up in
+            'cards.SRANK'. '''
     if cr is None: 
         return None
-    if cr == 'A':
-        if lr[0] in ['L','H']: 
-            return STRAT_RANKS.index(lr[0])
-        if lr[1] in ['L','H']: 
-            return STRAT_RANKS.index(lr[1])
-        return STRAT_RANKS.index('H') if (13-STRAT_RANKS.index(lr[0]) >= STRAT_RANKS.index(lr[1])) \
-                                      else STRAT_RANKS.index('L')
-    return STRAT_RANKS.index(cr)
+    if cr == c.ACE:
+        return c.SRANK[cr][lr[0]][lr[1]]
+    return cr
 
 def left_ace_is_L(self, left: Rank=None) -> Rank:
     ''' When the left (first) card is an Ace, always choose low ("L"). '''
-    return 'L'
+    return c.L
 
 def default_right_ace(self, left: Rank) -> Rank:
     ''' Delivers a low ("L") or high ("H") rank for an ace on the right card,
         the card drawn second. If the left card is an Ace, choose the opposite.
         Otherwise, choose L or H to maximize the size of the gap. '''
-    if left == 'H': 
-        return 'L'
-    if left == 'L': 
-        return 'H'
-    return 'H' if srank(left) <= 7 else 'L'
+    if left == c.H: 
+        return c.L
+    if left == c.L: 
+        return c.H
+    return c.H if left <= 7 else c.L
+
+DEFAULT_BET: dict[int,int] = {0:0,   1:0,         2:1,       3:1,  \
+                              4:1,   5:1,         6:1,       7:1,  \
+                              8:4,   9:4,        10:4,      11:12, \
+                              12:12, 13:1000000, 14:1000000}
 
 def default_bet_strategy(self, left: Rank, right: Rank) -> int:
     ''' Default Crinton bet strategy. Given Ranks for a left and right card,
         delivers an int bet size based on the rank gap between them. '''
-    DEFAULT_BET: dict[int,int] = {0:0,   1:0,         2:1,       3:1,  \
-                                  4:1,   5:1,         6:1,       7:1,  \
-                                  8:4,   9:4,        10:4,      11:12, \
-                                  12:12, 13:1000000, 14:1000000}
-    leftend: int  = srank(left,(left,right))
-    rightend: int = srank(right,(left,right))
-    gap: int      = abs(rightend-leftend)
-    return DEFAULT_BET[gap]
+    return DEFAULT_BET[c.GAP[left][right]]
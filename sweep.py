@@ -0,0 +1,162 @@
+''' Parameter sweeps from the command line, with a result cache on disk.
+        A sweep is the product of game types, player counts, antes, starting
+            chips, strategies and seeds; each combination is a cell of 'games'
+            games played with one strategy in every seat.
+        A cell's result is stored in 'cache_dir' under the SHA-256 of its full
+            configuration, 'main.ENGINE_VERSION' and every seat's strategy
+            fingerprint ('compiled.py'), so rerunning or extending a sweep only
+            plays the cells not already there, and a strategy that now decides
+            differently is played again.
+        Every cell, cached or not, is exported as rows of one CSV table, a row
+            per seat.
+    For example:
+        python sweep.py --gtype crinton steve --players 3-5 --ante 2 4 --seeds 0-9 \
+                        --games 10000 --output sweep.csv '''
+import argparse
+import csv
+import hashlib
+import importlib
+import itertools
+import json
+import os
+import sys
+import contextlib
+import numpy as np
+import analysis as an
+import main as m
+import compiled as cs
+import protocols as p
+
+CACHE_DIR: str = '.sweep_cache'
+
+COLUMNS: list[str] = ['gtype', 'players', 'ante', 'chips', 'strategy', 'seed', 'games',
+                      'engine', 'batch_size', 'seat', 'turns', 'chips_won', 'roi',
+                      'chips_per_game', 'stdev']
+
+def parse_ints(values: list[str]) -> list[int]:
+    ''' Ints from values such as '4' or '3-6' (inclusive). '''
+    ints: list[int] = []
+    for value in values:
+        low, _, high = value.partition('-')
+        ints.extend(range(int(low), int(high or low) + 1))
+    return ints
+
+def make_strategy(spec: str, gtype: m.GameType) -> p.Strategy:
+    ''' 'default' is the game's default strategy; otherwise 'module.Class'
+        names a Strategy class built without arguments. '''
+    if spec == 'default':
+        return m.GAMES[gtype][1]()
+    module, _, name = spec.rpartition('.')
+    if not module:
+        raise ValueError(f"Strategy {spec} is neither 'default' nor 'module.Class'")
+    return getattr(importlib.import_module(module), name)()
+
+def cell_key(cell: dict) -> str:
+    ''' SHA-256 of a cell's configuration, the engine version and its seats'
+        strategy fingerprints. '''
+    fingerprint: str = cs.compile_strategy(make_strategy(cell['strategy'],
+                                                         m.GameType(cell['gtype']))).fingerprint
+    content: str = json.dumps({**cell, 'engine_version': m.ENGINE_VERSION,
+                               'fingerprints': [fingerprint]*cell['players']}, sort_keys=True)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+def play_cell(cell: dict) -> dict:
+    ''' Plays one cell and returns its per-seat results. '''
+    gtype: m.GameType = m.GameType(cell['gtype'])
+    analysis: an.Analysis = m.play_games(gtype=gtype,
+                                         player_count=cell['players'],
+                                         game_count=cell['games'],
+                                         player_ante=cell['ante'],
+                                         execution=m.GAMES[gtype][0],
+                                         player_strategies=[make_strategy(cell['strategy'], gtype)]
+                                                           *cell['players'],
+                                         engine=m.Engine(cell['engine']),
+                                         batch_size=cell.get('batch_size', m.BATCH_SIZE),
+                                         rng=np.random.default_rng(cell['seed']),
+                                         starting_chips=cell['chips'])
+    return {'turns': analysis.turns,
+            'chips_won': analysis.chips_won,
+            'stdev': [analysis.stdev(s) for s in range(analysis.player_count)]}
+
+def write_result(path: str, cell: dict, result: dict) -> None:
+    temporary: str = f'{path}.tmp'
+    with open(temporary, 'w') as f:
+        json.dump({'cell': cell, 'engine_version': m.ENGINE_VERSION, 'result': result}, f)
+    os.replace(temporary, path)
+
+def run_sweep(cells: list[dict], cache_dir: str = CACHE_DIR, workers: int = 1) \
+    -> list[tuple[dict, dict]]:
+    ''' Each cell with its result, playing (across 'workers' processes) and
+        caching only the cells not yet in 'cache_dir'. '''
+    os.makedirs(cache_dir, exist_ok=True)
+    paths: list[str] = [os.path.join(cache_dir, f'{cell_key(cell)}.json') for cell in cells]
+    missing: list[int] = [i for i, path in enumerate(paths) if not os.path.exists(path)]
+    print(f'{len(cells)} cells, {len(cells) - len(missing)} cached, {len(missing)} to play',
+          file=sys.stderr)
+    with m.worker_pool(workers if missing else 1) as pool:
+        jobs: list[dict] = [cells[i] for i in missing]
+        played = map(play_cell, jobs) if pool is None else pool.imap(play_cell, jobs)
+        for i, result in zip(missing, played):
+            write_result(paths[i], cells[i], result)
+    results: list[tuple[dict, dict]] = []
+    for cell, path in zip(cells, paths):
+        with open(path) as f:
+            results.append((cell, json.load(f)['result']))
+    return results
+
+def rows(results: list[tuple[dict, dict]]) -> list[dict]:
+    ''' One row per seat of every cell, in COLUMNS. '''
+    table: list[dict] = []
+    for cell, result in results:
+        for seat in range(cell['players']):
+            turns: int = result['turns'][seat]
+            won: int   = result['chips_won'][seat]
+            table.append({**cell,
+                          'seat': seat,
+                          'turns': turns,
+                          'chips_won': won,
+                          'roi': won/turns if turns else 0.0,
+                          'chips_per_game': won/cell['games'],
+                          'stdev': result['stdev'][seat]})
+    return table
+
+def sweep_cells(gtypes: list[str], players: list[int], antes: list[int], chips: list[int],
+                strategies: list[str], seeds: list[int], games: int, engine: str,
+                batch_size: int = m.BATCH_SIZE) -> list[dict]:
+    ''' Every combination, as cell configurations. The batch engine's results
+        depend on its batch size, so its cells include it. '''
+    batch: dict = {'batch_size': batch_size} if engine == m.Engine.BATCH else {}
+    return [dict(gtype=gtype, players=count, ante=ante, chips=chip, strategy=strategy,
+                 seed=seed, games=games, engine=engine, **batch)
+            for gtype, count, ante, chip, strategy, seed \
+            in itertools.product(gtypes, players, antes, chips, strategies, seeds)]
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description='Sweep crinton simulations over a grid of '
+                                                 'configurations, caching every cell.')
+    parser.add_argument('--gtype', nargs='+', default=[m.GameType.CRINTON],
+                        choices=list(m.GameType))
+    parser.add_argument('--players', nargs='+', default=['5'], help="counts or ranges like '3-6'")
+    parser.add_argument('--ante', nargs='+', default=['4'])
+    parser.add_argument('--chips', nargs='+', default=[str(m.STARTING_CHIPS)])
+    parser.add_argument('--strategy', nargs='+', default=['default'],
+                        help="'default' or 'module.Class', played in every seat")
+    parser.add_argument('--seeds', nargs='+', default=['0'])
+    parser.add_argument('--games', type=int, default=1000, help='games per cell')
+    parser.add_argument('--engine', default=m.Engine.OBJECT, choices=list(m.Engine))
+    parser.add_argument('--batch-size', type=int, default=m.BATCH_SIZE)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--output', help='CSV file (default: standard output)')
+    args = parser.parse_args(argv)
+    cells: list[dict] = sweep_cells(args.gtype, parse_ints(args.players), parse_ints(args.ante),
+                                    parse_ints(args.chips), args.strategy, parse_ints(args.seeds),
+                                    args.games, args.engine, args.batch_size)
+    table: list[dict] = rows(run_sweep(cells, args.cache_dir, args.workers))
+    with open(args.output, 'w', newline='') if args.output else contextlib.nullcontext(sys.stdout) as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(table)
+
+if __name__ == "__main__":
+    main()
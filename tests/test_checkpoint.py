@@ -0,0 +1,29 @@
+''' Merging checkpoints of separate runs. '''
+import pytest
+import main as m
+import crinton as cr
+import optimizer as op
+import checkpoint as ck
+
+def run(path: str, seed: int, **changes) -> str:
+    ''' Checkpoints a small Crinton run to 'path', with 'changes' to its
+        arguments. '''
+    arguments: dict = dict(gtype=m.GameType.CRINTON, player_count=3, game_count=20, player_ante=4,
+                           execution=cr.CrintonExecution,
+                           player_strategies=[cr.CrintonStrategy()]*3, seed=seed,
+                           checkpoint_path=path)
+    m.run_analysis(**{**arguments, **changes})
+    return path
+
+def test_merge_adds_runs(tmp_path) -> None:
+    merged = ck.merge_checkpoints([run(str(tmp_path / 'a'), 1), run(str(tmp_path / 'b'), 2)])
+    assert merged.count == 40
+
+@pytest.mark.parametrize('changes', [dict(starting_chips=50),
+                                     dict(engine=m.Engine.BATCH),
+                                     dict(player_strategies=[op.ParamCrintonStrategy(
+                                         op.DEFAULT_PARAMS._replace(left_ace=13))]*3)])
+def test_merge_rejects_different_runs(tmp_path, changes: dict) -> None:
+    paths: list[str] = [run(str(tmp_path / 'a'), 1), run(str(tmp_path / 'b'), 2, **changes)]
+    with pytest.raises(ValueError):
+        ck.merge_checkpoints(paths)
@@ -0,0 +1,28 @@
+''' Compiling strategies. '''
+import gc
+import weakref
+import crinton as cr
+import compiled as cs
+
+class UnhashableStrategy(cr.CrintonStrategy):
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, UnhashableStrategy)
+    __hash__ = None
+
+def test_compiles_once() -> None:
+    strategy = cr.CrintonStrategy()
+    assert cs.compile_strategy(strategy) is cs.compile_strategy(strategy)
+    assert cs.verify_compiled(cs.compile_strategy(strategy)) == []
+
+def test_compiles_unhashable_strategies() -> None:
+    strategy = UnhashableStrategy()
+    assert cs.compile_strategy(strategy).fingerprint == \
+           cs.compile_strategy(cr.CrintonStrategy()).fingerprint
+
+def test_does_not_keep_strategies_alive() -> None:
+    strategy = cr.CrintonStrategy()
+    cs.compile_strategy(strategy)
+    ref = weakref.ref(strategy)
+    del strategy
+    gc.collect()
+    assert ref() is None
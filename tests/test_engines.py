@@ -0,0 +1,33 @@
+''' Games that end with their pot unclaimed, on both engines. '''
+import numpy as np
+import main as m
+import batch as bt
+import crinton as cr
+
+def test_batch_ends_games_nobody_can_play() -> None:
+    # With this seed two of the games leave every seat without chips.
+    games = bt.BatchGames(gtype=m.GameType.CRINTON,
+                          execution=cr.CrintonExecution,
+                          player_strategies=[cr.CrintonStrategy()]*3,
+                          game_count=20000,
+                          player_ante=4,
+                          starting_chips=m.STARTING_CHIPS,
+                          rng=np.random.default_rng(0))
+    games.play()
+    for game in (12490, 13697):
+        assert games.pot[game] > 0
+        assert (games.chips[game] <= 0).all()
+
+def test_engines_end_games_without_chips() -> None:
+    for engine in m.Engine:
+        analysis = m.play_games(gtype=m.GameType.CRINTON,
+                                player_count=3,
+                                game_count=10,
+                                player_ante=4,
+                                execution=cr.CrintonExecution,
+                                player_strategies=[cr.CrintonStrategy()]*3,
+                                engine=engine,
+                                rng=np.random.default_rng(0),
+                                starting_chips=4)
+        assert analysis.turns == [0, 0, 0]
+        assert analysis.chips_won == [-40, -40, -40]
@@ -0,0 +1,20 @@
+''' Turn-by-turn replays against the reference rules. '''
+import numpy as np
+import pytest
+import main as m
+import batch as bt
+import equivalence as eq
+
+@pytest.mark.parametrize('gtype', list(m.GameType))
+def test_batch_replays_the_reference(gtype: m.GameType) -> None:
+    result: eq.Replay = eq.replay(gtype, eq.reference(gtype), eq.candidates(gtype)['batch'],
+                                  games=200, seed=0)
+    assert result.turns > 0
+    assert result.mismatch is None
+
+def test_replay_finds_a_batch_mismatch(monkeypatch) -> None:
+    monkeypatch.setattr(bt, 'STANDARD_PAYOUT', np.maximum(bt.STANDARD_PAYOUT, -1))
+    result: eq.Replay = eq.replay(m.GameType.CRINTON, eq.reference(m.GameType.CRINTON),
+                                  eq.candidates(m.GameType.CRINTON)['batch'], games=200, seed=0)
+    assert result.mismatch is not None
+    assert 'payout' in result.fields
@@ -0,0 +1,18 @@
+''' Chips are conserved by the Markov chain, truncated games included. '''
+import pytest
+import main as m
+import crinton as cr
+import markov as mk
+
+def test_chip_states_conserve_chips() -> None:
+    value: mk.GameValue = mk.solve_game_chips(m.GameType.CRINTON, 2, 2, [cr.CrintonStrategy()]*2,
+                                              starting_chips=12)
+    assert value.truncated_mass > 0
+    assert sum(value.expected_net) + value.unclaimed == pytest.approx(0, abs=1e-9)
+
+def test_truncated_pots_are_settled() -> None:
+    value: mk.GameValue = mk.solve_game(m.GameType.CRINTON, 5, 4, [cr.CrintonStrategy()]*5,
+                                        max_pot=60, max_turns=200)
+    assert value.truncated_mass > 0.01
+    assert sum(value.expected_net) == pytest.approx(0, abs=1e-9)
+    assert value.error_bound >= value.truncated_mass*60
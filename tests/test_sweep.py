@@ -0,0 +1,12 @@
+''' Sweep cache keys. '''
+import crinton as cr
+import sweep as sw
+
+CELL: dict = {'gtype': 'crinton', 'players': 3, 'ante': 4, 'chips': 160, 'strategy': 'default',
+              'seed': 0, 'games': 100, 'engine': 'object'}
+
+def test_cell_key_follows_strategy_decisions(monkeypatch) -> None:
+    before: str = sw.cell_key(CELL)
+    assert sw.cell_key(CELL) == before
+    monkeypatch.setattr(cr.CrintonStrategy, 'bet_strategy', lambda self, left, right: 1)
+    assert sw.cell_key(CELL) != before
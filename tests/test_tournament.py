@@ -0,0 +1,24 @@
+''' Tournament caching. '''
+import pytest
+import main as m
+import crinton as cr
+import optimizer as op
+import tournament as t
+
+STRATEGIES: list = [cr.CrintonStrategy(),
+                    op.ParamCrintonStrategy(op.DEFAULT_PARAMS._replace(left_ace=13))]
+
+def test_cache_needs_a_seed(tmp_path) -> None:
+    with pytest.raises(ValueError):
+        t.run_tournament(m.GameType.CRINTON, cr.CrintonExecution, STRATEGIES, 3, 20, 4,
+                         cache_path=str(tmp_path / 'cache.json'))
+
+def test_cache_is_reused(tmp_path) -> None:
+    cache: dict[str, t.Matchup] = {}
+    first = t.run_tournament(m.GameType.CRINTON, cr.CrintonExecution, STRATEGIES, 3, 20, 4,
+                             seed=1, cache=cache)
+    size: int = len(cache)
+    again = t.run_tournament(m.GameType.CRINTON, cr.CrintonExecution, STRATEGIES, 3, 20, 4,
+                             seed=1, cache=cache)
+    assert len(cache) == size
+    assert again.matchups == first.matchups
@@ -0,0 +1,21 @@
+''' Turn logs of large pots. '''
+import numpy as np
+import main as m
+import crinton as cr
+import turnlog as tl
+
+def test_records_bets_beyond_int16(tmp_path) -> None:
+    path: str = str(tmp_path / 'run.turns')
+    analysis = m.play_games(gtype=m.GameType.CRINTON,
+                            player_count=5,
+                            game_count=20,
+                            player_ante=7000,
+                            execution=cr.CrintonExecution,
+                            player_strategies=[cr.CrintonStrategy()]*5,
+                            rng=np.random.default_rng(0),
+                            record_path=path,
+                            starting_chips=10000)
+    records: np.ndarray = tl.open_log(path)
+    assert len(records) == sum(analysis.turns)
+    assert np.abs(records['payout']).max() > np.iinfo(np.int16).max
+    assert (records['pot_before'] - records['payout'] - records['side'] == records['pot_after']).all()
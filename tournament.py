@@ -0,0 +1,168 @@
+''' Round-robin tournaments of mixed tables.
+        Given a pool of strategies, every composition of a table (a multiset of
+            the pool) is played in several seatings: its rotations, or every
+            distinct permutation. Each seating is a matchup of 'games' games.
+        Matchups are scheduled across worker processes and cached by
+            'matchup_key', in memory and optionally in a JSON file, so rerunning
+            or growing a tournament only plays the matchups not yet finished.
+            Strategies are identified by their compiled tables' fingerprint
+            ('compiled.py'), which also keys each matchup's shuffling stream, so
+            a cached matchup is the one the same seating would play again.
+        Results are a payoff matrix, one strategy in a field of another, and
+            standings aggregated over every seat each strategy played. '''
+from itertools import combinations_with_replacement, permutations
+from typing import NamedTuple
+from enum import StrEnum, auto
+import json
+import os
+import numpy as np
+import main as m
+import compiled as cs
+import protocols as p
+
+class Seating(StrEnum):
+    ROTATIONS    = auto()
+    PERMUTATIONS = auto()
+
+class Matchup(NamedTuple):
+    ''' Totals of one seating, per seat. '''
+    games: int
+    chips_won: list[int]
+    turns: list[int]
+
+class Standing(NamedTuple):
+    name: str
+    seat_games: int
+    chips_per_game: float
+    roi: float
+
+class Tournament(NamedTuple):
+    ''' 'payoff' [i][j]: chips won per game by a seat playing strategy i when
+            every other seat plays strategy j.
+        'standings': per strategy over all its seats, best first. '''
+    names: list[str]
+    matchups: dict[tuple[int, ...], Matchup]
+    payoff: np.ndarray
+    standings: list[Standing]
+
+def seatings(strategy_count: int, player_count: int, seating: Seating) -> list[tuple[int, ...]]:
+    ''' Every seating of every table composition, as strategy indices by seat. '''
+    found: list[tuple[int, ...]] = []
+    for composition in combinations_with_replacement(range(strategy_count), player_count):
+        if seating == Seating.PERMUTATIONS:
+            arranged = sorted(set(permutations(composition)))
+        else:
+            arranged = dict.fromkeys(composition[k:] + composition[:k] for k in range(player_count))
+        found.extend(arranged)
+    return found
+
+def fingerprints(strategies: list[p.Strategy], seats: tuple[int, ...]) -> list[str]:
+    return [cs.compile_strategy(strategies[s]).fingerprint for s in seats]
+
+def matchup_key(gtype: m.GameType, execution: p.GameExecution, engine: m.Engine,
+                strategies: list[p.Strategy], seats: tuple[int, ...],
+                games: int, player_ante: int, entropy: int) -> str:
+    return '|'.join([gtype, f'{execution.__module__}.{execution.__qualname__}', engine,
+                     str(m.ENGINE_VERSION), str(player_ante), str(games), str(entropy)]
+                    + fingerprints(strategies, seats))
+
+def play_matchup(gtype: m.GameType, execution: p.GameExecution, strategies: list[p.Strategy],
+                 seats: tuple[int, ...], games: int, player_ante: int, entropy: int,
+                 engine: m.Engine) -> Matchup:
+    ''' Plays one seating, shuffling with a stream keyed by its seats' fingerprints. '''
+    spawn_key: tuple[int, ...] = tuple(int(fingerprint, 16)
+                                       for fingerprint in fingerprints(strategies, seats))
+    analysis = m.play_games(gtype=gtype,
+                            player_count=len(seats),
+                            game_count=games,
+                            player_ante=player_ante,
+                            execution=execution,
+                            player_strategies=[strategies[s] for s in seats],
+                            engine=engine,
+                            rng=np.random.default_rng(np.random.SeedSequence(entropy,
+                                                                             spawn_key=spawn_key)))
+    return Matchup(games=analysis.count, chips_won=analysis.chips_won, turns=analysis.turns)
+
+def run_tournament(gtype: m.GameType,
+                   execution: p.GameExecution,
+                   strategies: list[p.Strategy],
+                   player_count: int,
+                   games: int,
+                   player_ante: int,
+                   seating: Seating = Seating.ROTATIONS,
+                   engine: m.Engine = m.Engine.OBJECT,
+                   seed: int | None = None,
+                   workers: int = 1,
+                   cache: dict[str, Matchup] | None = None,
+                   cache_path: str | None = None) -> Tournament:
+    ''' Plays every seating of 'strategies' not already in 'cache' (or the
+        JSON file at 'cache_path', which is updated), then displays and returns
+        the Tournament. A cache needs a 'seed': matchups are keyed by it, so
+        fresh entropy would never be found again. '''
+    if seed is None and (cache is not None or cache_path is not None):
+        raise ValueError('A cached tournament needs a seed')
+    names: list[str] = [strategy.name for strategy in strategies]
+    entropy: int = np.random.SeedSequence(seed).entropy
+    cache = {} if cache is None else cache
+    if cache_path is not None and os.path.exists(cache_path):
+        with open(cache_path) as f:
+            cache.update({key: Matchup(*value) for key, value in json.load(f).items()})
+    tables: list[tuple[int, ...]] = seatings(len(strategies), player_count, seating)
+    def key(seats: tuple[int, ...]) -> str:
+        return matchup_key(gtype, execution, engine, strategies, seats, games, player_ante, entropy)
+    pending: list[tuple[int, ...]] = [seats for seats in tables if key(seats) not in cache]
+    jobs: list[tuple] = [(gtype, execution, strategies, seats, games, player_ante, entropy, engine)
+                         for seats in pending]
+    with m.worker_pool(workers if jobs else 1) as pool:
+        results: list[Matchup] = [play_matchup(*job) for job in jobs] if pool is None \
+                                 else pool.starmap(play_matchup, jobs)
+    for seats, result in zip(pending, results):
+        cache[key(seats)] = result
+    if cache_path is not None and results:
+        with open(cache_path, 'w') as f:
+            json.dump({k: list(v) for k, v in cache.items()}, f)
+    matchups: dict[tuple[int, ...], Matchup] = {seats: cache[key(seats)] for seats in tables}
+    tournament = Tournament(names=names,
+                            matchups=matchups,
+                            payoff=payoff_matrix(len(strategies), matchups),
+                            standings=standings(names, matchups))
+    display_tournament(tournament)
+    return tournament
+
+def payoff_matrix(strategy_count: int, matchups: dict[tuple[int, ...], Matchup]) -> np.ndarray:
+    chips: np.ndarray = np.zeros((strategy_count, strategy_count))
+    seat_games: np.ndarray = np.zeros((strategy_count, strategy_count))
+    for seats, matchup in matchups.items():
+        for seat, s in enumerate(seats):
+            others: set[int] = set(seats[:seat] + seats[seat+1:])
+            if len(others) == 1:
+                field: int = others.pop()
+                chips[s, field]      += matchup.chips_won[seat]
+                seat_games[s, field] += matchup.games
+    return np.divide(chips, seat_games, out=np.full_like(chips, np.nan), where=seat_games > 0)
+
+def standings(names: list[str], matchups: dict[tuple[int, ...], Matchup]) -> list[Standing]:
+    chips: list[int]      = [0]*len(names)
+    turns: list[int]      = [0]*len(names)
+    seat_games: list[int] = [0]*len(names)
+    for seats, matchup in matchups.items():
+        for seat, s in enumerate(seats):
+            chips[s]      += matchup.chips_won[seat]
+            turns[s]      += matchup.turns[seat]
+            seat_games[s] += matchup.games
+    table: list[Standing] = [Standing(name=names[s],
+                                      seat_games=seat_games[s],
+                                      chips_per_game=chips[s]/seat_games[s] if seat_games[s] else 0.0,
+                                      roi=chips[s]/turns[s] if turns[s] else 0.0)
+                             for s in range(len(names))]
+    return sorted(table, key=lambda standing: -standing.chips_per_game)
+
+def display_tournament(tournament: Tournament) -> None:
+    width: int = max(len(name) for name in tournament.names) + 2
+    print(f'Matchups: {len(tournament.matchups)}\t\tPayoff (row strategy vs a field of column strategy)')
+    print(' '*width + ''.join(f'{name:>{width}}' for name in tournament.names))
+    for name, row in zip(tournament.names, tournament.payoff):
+        print(f'{name:<{width}}' + ''.join(f'{value:>{width}.3f}' for value in row))
+    for rank, standing in enumerate(tournament.standings, 1):
+        print(f'{rank}. {standing.name:<{width}} Seat games: {standing.seat_games:>10}'
+              f' Chips Won/g: {standing.chips_per_game:8.3f} ROI/t: {standing.roi:10.5f}')
@@ -0,0 +1,140 @@
+''' Binary turn logs: one fixed-width TURN_RECORD per turn, appended to a file.
+        A TurnRecorder given to 'main.play_games' (through 'record_path') is
+            handed every turn by the executions' 'execute' methods.
+        A log is raw records with no header, so it is read back as an
+            'np.memmap' and aggregated a chunk at a time, without loading it.
+    Run as a script to summarize logs by gap:
+        python turnlog.py run.turns [run.turns.1 ...] '''
+import sys
+from collections.abc import Callable, Iterator
+import numpy as np
+import cards as c
+
+# Cards and ranks are NO_CARD where none was drawn: the middle card of a zero
+# bet, and every second-bet field outside Steve.
+NO_CARD: int = -1
+
+TURN_RECORD = np.dtype([('game',       np.int64),
+                        ('seat',       np.int8),
+                        ('left',       np.int8),
+                        ('middle',     np.int8),
+                        ('right',      np.int8),
+                        ('left2',      np.int8),
+                        ('middle2',    np.int8),
+                        ('right2',     np.int8),
+                        ('bet',        np.int32),
+                        ('payout',     np.int32),
+                        ('bet2',       np.int32),
+                        ('payout2',    np.int32),
+                        ('side',       np.int32),
+                        ('pot_before', np.int32),
+                        ('pot_after',  np.int32)])
+
+BUFFER_TURNS: int = 1 << 16
+CHUNK_TURNS: int  = 1 << 22
+GAPS: int         = len(c.STRAT_RANKS)
+
+class TurnRecorder:
+    ''' Writes TURN_RECORDs to 'path', replacing any earlier log there, and
+        buffers 'buffer_turns' at a time.
+            'game' ids count up from 'first_game' with each 'new_game'.
+            'payout' and 'payout2' are the player's payouts from the first and
+                (Steve) second bet; 'side' is the total paid to Gamblor side bets.
+            'pot_before' is the pot the turn's bets are capped by, 'pot_after'
+                what is left once every payout is made. '''
+    def __init__(self, path: str, first_game: int = 0, buffer_turns: int = BUFFER_TURNS) -> None:
+        self.path: str          = path
+        self.file               = open(path, 'wb')
+        self.game: int          = first_game - 1
+        self.buffer: np.ndarray = np.zeros(buffer_turns, dtype=TURN_RECORD)
+        self.count: int         = 0
+
+    def new_game(self) -> None:
+        self.game += 1
+
+    def record(self, execution, payouts: list[int],
+               left: int, middle: int | None, right: int, bet: int, payout: int,
+               left2: int = NO_CARD, middle2: int | None = NO_CARD, right2: int = NO_CARD,
+               bet2: int = 0, payout2: int = 0) -> None:
+        total: int = sum(payouts)
+        self.buffer[self.count] = (self.game, execution.seat,
+                                   left, NO_CARD if middle is None else middle, right,
+                                   left2, NO_CARD if middle2 is None else middle2, right2,
+                                   bet, payout, bet2, payout2,
+                                   total - payouts[execution.seat],
+                                   execution.pot, execution.pot - total)
+        self.count += 1
+        if self.count == len(self.buffer):
+            self.flush()
+
+    def record_turns(self, records: np.ndarray) -> None:
+        ''' Writes whole TURN_RECORDs, as the batch engine makes them a step of
+            many games at a time. '''
+        self.flush()
+        records.tofile(self.file)
+
+    def flush(self) -> None:
+        self.buffer[:self.count].tofile(self.file)
+        self.file.flush()
+        self.count = 0
+
+    def close(self) -> None:
+        self.flush()
+        self.file.close()
+
+    def __enter__(self) -> 'TurnRecorder':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+def open_log(path: str) -> np.memmap:
+    ''' The records of a log, mapped read-only. '''
+    return np.memmap(path, dtype=TURN_RECORD, mode='r')
+
+def chunks(paths: list[str], chunk_turns: int = CHUNK_TURNS) -> Iterator[np.ndarray]:
+    ''' The records of every log in turn, 'chunk_turns' at a time. '''
+    for path in paths:
+        log: np.memmap = open_log(path)
+        for start in range(0, len(log), chunk_turns):
+            yield np.asarray(log[start:start+chunk_turns])
+
+def tally(paths: list[str], key: Callable[[np.ndarray], np.ndarray], size: int,
+          value: Callable[[np.ndarray], np.ndarray] | None = None,
+          chunk_turns: int = CHUNK_TURNS) -> np.ndarray:
+    ''' Sums 'value' of every record (counts records, without 'value') into 'size'
+        bins by 'key'. Both are vectorized over a chunk of records. '''
+    total: np.ndarray = np.zeros(size, dtype=np.int64 if value is None else np.float64)
+    for chunk in chunks(paths, chunk_turns):
+        total += np.bincount(key(chunk), None if value is None else value(chunk),
+                             minlength=size).astype(total.dtype)
+    return total
+
+def gap(records: np.ndarray) -> np.ndarray:
+    ''' Gap between the ranked left and right cards of each turn's first bet. '''
+    return records['right'].astype(np.int64) - records['left']
+
+def gap_summary(paths: list[str], chunk_turns: int = CHUNK_TURNS) -> dict[str, np.ndarray]:
+    ''' Per gap of the first bet: turns, turns with a bet, chips bet, the
+        player's payouts from the first bet, and turns that drained the pot. '''
+    return {'turns':   tally(paths, gap, GAPS, chunk_turns=chunk_turns),
+            'bets':    tally(paths, gap, GAPS, lambda r: r['bet'] > 0, chunk_turns),
+            'wagered': tally(paths, gap, GAPS, lambda r: r['bet'], chunk_turns),
+            'payout':  tally(paths, gap, GAPS, lambda r: r['payout'], chunk_turns),
+            'drained': tally(paths, gap, GAPS, lambda r: r['pot_after'] <= 0, chunk_turns)}
+
+def display_gap_summary(paths: list[str]) -> None:
+    summary: dict[str, np.ndarray] = gap_summary(paths)
+    print(f"Gap {'Turns':>14} {'Bets':>14} {'Payout/t':>10} {'Payout/bet':>11} {'Drained':>12}")
+    for g in range(GAPS):
+        turns: int = int(summary['turns'][g])
+        if turns == 0:
+            continue
+        wagered: float = summary['wagered'][g]
+        print(f"{g:>3} {turns:>14} {int(summary['bets'][g]):>14}"
+              f" {summary['payout'][g]/turns:10.5f}"
+              f" {summary['payout'][g]/wagered if wagered else 0:11.5f}"
+              f" {int(summary['drained'][g]):>12}")
+
+if __name__ == "__main__":
+    display_gap_summary(sys.argv[1:])